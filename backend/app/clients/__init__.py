@@ -1,5 +1,5 @@
 """Bank HTTP clients package."""
-from app.clients.factory import get_bank_client, get_all_bank_clients
+from app.clients.factory import close_bank_clients, get_bank_client, get_all_bank_clients
 from app.clients.abank_client import ABankClient
 from app.clients.sbank_client import SBankClient
 from app.clients.vbank_client import VBankClient
@@ -7,6 +7,7 @@ from app.clients.vbank_client import VBankClient
 __all__ = [
     "get_bank_client",
     "get_all_bank_clients",
+    "close_bank_clients",
     "ABankClient",
     "SBankClient",
     "VBankClient",
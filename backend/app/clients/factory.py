@@ -4,6 +4,16 @@ from app.clients.sbank_client import SBankClient
 from app.clients.vbank_client import VBankClient
 from app.core.base_client import BaseBankClient
 
+_CLIENT_CLASSES: dict[str, type[BaseBankClient]] = {
+    "vbank": VBankClient,
+    "abank": ABankClient,
+    "sbank": SBankClient,
+}
+
+# Long-lived clients per bank code, so HTTP connections (TCP/TLS) are reused
+# across requests; closed on application shutdown by close_bank_clients()
+_clients: dict[str, BaseBankClient] = {}
+
 
 def get_bank_client(bank_code: str) -> BaseBankClient:
     """Get bank client by bank code.
@@ -12,21 +22,20 @@ def get_bank_client(bank_code: str) -> BaseBankClient:
         bank_code: Bank code (vbank, abank, sbank)
 
     Returns:
-        Bank client instance
+        Shared bank client instance (do not close it after use)
 
     Raises:
         ValueError: If bank code is not supported
     """
     bank_code_lower = bank_code.lower()
 
-    if bank_code_lower == "vbank":
-        return VBankClient()
-    elif bank_code_lower == "abank":
-        return ABankClient()
-    elif bank_code_lower == "sbank":
-        return SBankClient()
-    else:
-        raise ValueError(f"Unsupported bank code: {bank_code}")
+    client = _clients.get(bank_code_lower)
+    if client is None:
+        client_class = _CLIENT_CLASSES.get(bank_code_lower)
+        if client_class is None:
+            raise ValueError(f"Unsupported bank code: {bank_code}")
+        client = _clients[bank_code_lower] = client_class()
+    return client
 
 
 def get_all_bank_clients() -> dict[str, BaseBankClient]:
@@ -35,9 +44,12 @@ def get_all_bank_clients() -> dict[str, BaseBankClient]:
     Returns:
         Dictionary mapping bank codes to client instances
     """
-    return {
-        "vbank": VBankClient(),
-        "abank": ABankClient(),
-        "sbank": SBankClient(),
-    }
+    return {bank_code: get_bank_client(bank_code) for bank_code in _CLIENT_CLASSES}
+
 
+async def close_bank_clients() -> None:
+    """Close all pooled bank clients (call on application shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
@@ -2,6 +2,7 @@
 from app.core.exceptions import BankAPIError, ConsentRequiredError
 from app.core.types import Account, Balance, Transaction, BankTokenResponse, ConsentRequest, ConsentResponse
 from app.core.base_client import BaseBankClient
+from app.core.cache import TTLCache
 
 __all__ = [
     "BankAPIError",
@@ -13,5 +14,6 @@ __all__ = [
     "ConsentRequest",
     "ConsentResponse",
     "BaseBankClient",
+    "TTLCache",
 ]
 
@@ -1,6 +1,7 @@
 """Base HTTP client for bank APIs."""
 from typing import Any, Optional
 import httpx
+import orjson
 from app.core.exceptions import BankAPIError
 
 
@@ -29,12 +30,31 @@ class BaseBankClient:
         self.client_secret = client_secret
         self.bank_code = bank_code
         self.timeout = timeout
-        self._client = httpx.AsyncClient(timeout=timeout)
+        # Clients are long-lived and shared, so keep a bounded keep-alive pool
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
 
     async def close(self) -> None:
         """Close HTTP client."""
         await self._client.aclose()
 
+    @staticmethod
+    def _parse_json(response: httpx.Response) -> Any:
+        """Decode JSON response body.
+
+        Uses orjson, which is considerably faster than the stdlib decoder
+        behind ``response.json()`` on large transaction payloads.
+
+        Args:
+            response: HTTP response
+
+        Returns:
+            Decoded JSON data
+        """
+        return orjson.loads(response.content)
+
     def _build_headers(
         self,
         token: str,
@@ -82,7 +102,7 @@ class BaseBankClient:
         try:
             response = await self._client.post(url, params=params)
             response.raise_for_status()
-            return response.json()
+            return self._parse_json(response)
         except httpx.HTTPStatusError as e:
             raise BankAPIError(
                 status_code=e.response.status_code,
@@ -132,7 +152,7 @@ class BaseBankClient:
         try:
             response = await self._client.post(url, headers=headers, json=payload)
             response.raise_for_status()
-            return response.json()
+            return self._parse_json(response)
         except httpx.HTTPStatusError as e:
             raise BankAPIError(
                 status_code=e.response.status_code,
@@ -176,7 +196,7 @@ class BaseBankClient:
         try:
             response = await self._client.get(url, headers=headers, params=params)
             response.raise_for_status()
-            return response.json()
+            return self._parse_json(response)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 403:
                 error_detail = e.response.text
@@ -236,7 +256,7 @@ class BaseBankClient:
         try:
             response = await self._client.get(url, headers=headers, params=params)
             response.raise_for_status()
-            return response.json()
+            return self._parse_json(response)
         except httpx.HTTPStatusError as e:
             raise BankAPIError(
                 status_code=e.response.status_code,
@@ -292,7 +312,7 @@ class BaseBankClient:
             logger.info(f"📥 Response status: {response.status_code} for account {account_id}")
             
             response.raise_for_status()
-            response_data = response.json()
+            response_data = self._parse_json(response)
             logger.debug(f"📦 Response data keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'not a dict'}")
             return response_data
         except httpx.HTTPStatusError as e:
@@ -327,6 +347,68 @@ class BaseBankClient:
                 detail=f"Network error while getting balances: {str(e)}",
             )
 
+    async def get_balances_batch(
+        self,
+        bank_token: str,
+        account_ids: list[str],
+        client_id: Optional[str] = None,
+        requesting_bank: Optional[str] = None,
+        consent_id: Optional[str] = None,
+    ) -> dict:
+        """Get balances for several accounts in one request.
+
+        Not every bank implements this endpoint; callers should fall back to
+        get_balances on 404/501.
+
+        Args:
+            bank_token: Bank token for authentication
+            account_ids: Account IDs
+            client_id: Client ID (for interbank requests)
+            requesting_bank: Requesting bank ID (for interbank requests)
+            consent_id: Consent ID (for interbank requests)
+
+        Returns:
+            Balances response mapping account IDs to balances
+
+        Raises:
+            BankAPIError: If request fails
+        """
+        url = f"{self.base_url}/balances"
+        headers = self._build_headers(
+            bank_token, requesting_bank=requesting_bank, consent_id=consent_id
+        )
+        params = {"account_ids": ",".join(account_ids)}
+        if client_id:
+            params["client_id"] = client_id
+
+        try:
+            response = await self._client.get(url, headers=headers, params=params)
+            response.raise_for_status()
+            return self._parse_json(response)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 403:
+                error_detail = e.response.text
+                if (
+                    "CONSENT_REQUIRED" in error_detail.upper()
+                    or "consent" in error_detail.lower()
+                    or "PENDING" in error_detail.upper()
+                ):
+                    from app.core.exceptions import ConsentRequiredError
+
+                    raise ConsentRequiredError(
+                        status_code=403,
+                        detail=f"Consent is required for getting balances: {error_detail}",
+                    )
+            raise BankAPIError(
+                status_code=e.response.status_code,
+                detail=f"Failed to get balances: {e.response.text}",
+            )
+        except httpx.RequestError as e:
+            raise BankAPIError(
+                status_code=503,
+                detail=f"Network error while getting balances: {str(e)}",
+            )
+
     async def get_transactions(
         self,
         bank_token: str,
@@ -376,7 +458,7 @@ class BaseBankClient:
         try:
             response = await self._client.get(url, headers=headers, params=params)
             response.raise_for_status()
-            return response.json()
+            return self._parse_json(response)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 403:
                 error_detail = e.response.text
@@ -0,0 +1,141 @@
+"""In-memory caching utilities."""
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded in-memory cache with per-entry expiry.
+
+    Entries expire ``ttl`` seconds after they were set. When the cache grows
+    beyond ``maxsize`` the oldest entries are evicted first.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0):
+        """Initialize cache.
+
+        Args:
+            maxsize: Maximum number of entries kept in memory
+            ttl: Default entry lifetime in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get cached value if still valid.
+
+        Args:
+            key: Cache key
+            default: Value returned on miss or expiry
+
+        Returns:
+            Cached value, or default if missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            # Entry expired
+            del self._data[key]
+            return default
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Entry lifetime in seconds (default: cache ttl)
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove entry and return its value.
+
+        Args:
+            key: Cache key
+            default: Value returned if entry is missing or expired
+
+        Returns:
+            Removed value, or default if missing or expired
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        del self._data[key]
+        return value
+
+    def keys(self) -> list[Hashable]:
+        """Get a snapshot of the cached keys (expired entries included).
+
+        Returns:
+            List of keys
+        """
+        return list(self._data)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+async def single_flight(
+    inflight: dict[Hashable, asyncio.Task],
+    key: Hashable,
+    coro_factory: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Run coro_factory once per key, sharing the result with concurrent callers.
+
+    Callers arriving while a task for key is running await that task instead
+    of starting another one. The task removes itself from inflight when done.
+
+    Args:
+        inflight: Running tasks by key, owned by the caller
+        key: Key identifying the work
+        coro_factory: Zero-argument callable returning the coroutine to run
+
+    Returns:
+        Result of the shared task
+
+    Raises:
+        Exception: Whatever the shared task raised
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(coro_factory())
+        inflight[key] = task
+        task.add_done_callback(partial(_single_flight_done, inflight, key))
+
+    # shield: a caller that times out or is cancelled must not cancel the
+    # task other callers are waiting for
+    return await asyncio.shield(task)
+
+
+def _single_flight_done(
+    inflight: dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task
+) -> None:
+    """Forget finished task."""
+    if inflight.get(key) is task:
+        del inflight[key]
+    # Mark exception as retrieved in case every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
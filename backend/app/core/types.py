@@ -1,4 +1,6 @@
 """Common types for bank clients."""
+from datetime import datetime
+from functools import cached_property
 from typing import Any, Optional
 from pydantic import BaseModel
 
@@ -61,3 +63,19 @@ class Transaction(BaseModel):
     description: Optional[str] = None
     mcc: Optional[str] = None
 
+    @cached_property
+    def amount_value(self) -> Optional[float]:
+        """Amount parsed once as float (None if not a number)."""
+        try:
+            return float(self.amount)
+        except (ValueError, TypeError):
+            return None
+
+    @cached_property
+    def booking_datetime(self) -> Optional[datetime]:
+        """Booking date parsed once (None if not an ISO 8601 date)."""
+        try:
+            # Python 3.11+ fromisoformat accepts the trailing "Z" banks send
+            return datetime.fromisoformat(self.booking_date)
+        except (ValueError, TypeError):
+            return None
@@ -1,6 +1,8 @@
 """FastAPI application entry point."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.clients.factory import close_bank_clients
 from app.core.security import SecurityHeadersMiddleware, RateLimitMiddleware
 from app.core.logging_config import setup_logging
 from app.settings import settings
@@ -9,12 +11,21 @@ from app.routers import banks, health
 # Setup secure logging
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: close pooled bank clients on shutdown."""
+    yield
+    await close_bank_clients()
+
+
 app = FastAPI(
     title="FinGuru API",
     description="Мультибанковский агрегатор с кешбек-игрой",
     version="0.1.0",
     docs_url="/docs",  # Always enable docs for development
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Security headers middleware (must be first)
@@ -2,7 +2,8 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from app.routers.schemas import (
     TokenResponse,
@@ -19,11 +20,12 @@ from app.routers.schemas import (
 )
 from app.services.token_service import TokenService
 from app.services.consent_service import ConsentService
-from app.services.aggregation import AggregationService
+from app.services.aggregation import AggregationService, request_accounts_cache
 from app.services.analytics import AnalyticsService
 from app.services.cashback import CashbackService
 from app.services.account_linking import AccountLinkingService
 from app.core.exceptions import BankAPIError, ConsentRequiredError
+from app.core.types import Transaction
 from app.core.input_validation import (
     validate_bank_code,
     validate_client_id,
@@ -33,7 +35,12 @@ from app.core.input_validation import (
     validate_bonus_percent,
 )
 
-router = APIRouter(prefix="/api", tags=["banks"])
+router = APIRouter(
+    prefix="/api",
+    tags=["banks"],
+    # Share get_accounts results between services within a single request
+    dependencies=[Depends(request_accounts_cache)],
+)
 
 
 @router.post("/tokens/{bank}", response_model=TokenResponse)
@@ -164,6 +171,44 @@ async def aggregate_accounts(
         raise HTTPException(status_code=500, detail=f"Failed to aggregate accounts: {str(e)}")
 
 
+@router.get("/accounts/aggregate/stream")
+async def aggregate_accounts_stream(
+    client_id: str = Query(..., description="Client ID"),
+    bank: Optional[str] = Query(None, description="Filter by specific bank (vbank, abank, sbank)"),
+) -> StreamingResponse:
+    """Stream aggregated accounts as newline-delimited JSON.
+
+    Each bank's accounts are sent as soon as that bank responds, so the
+    client does not wait for the slowest bank.
+
+    Args:
+        client_id: Client ID
+        bank: Optional bank code to filter by
+
+    Returns:
+        NDJSON stream of unified accounts (one AccountResponse per line)
+    """
+    # Validate inputs
+    client_id = validate_client_id(client_id)
+    bank_codes = None
+    if bank:
+        bank_codes = [validate_bank_code(bank)]
+
+    async def account_lines():
+        async for acc in AggregationService.get_accounts_stream(client_id, bank_codes=bank_codes):
+            account = AccountResponse(
+                account_id=acc.account_id,
+                bank=acc.bank,
+                currency=acc.currency,
+                account_type=acc.account_type,
+                nickname=acc.nickname,
+                servicer=acc.servicer,
+            )
+            yield account.model_dump_json() + "\n"
+
+    return StreamingResponse(account_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/transactions/aggregate", response_model=list[TransactionResponse])
 async def aggregate_transactions(
     client_id: str = Query(..., description="Client ID"),
@@ -209,8 +254,10 @@ async def aggregate_transactions(
 
     logger = logging.getLogger(__name__)
     try:
+        # Fetch accounts once and reuse them for transactions and the demo check below
+        accounts = await AggregationService.get_accounts(client_id, bank_codes=bank_codes)
         transactions = await AggregationService.get_transactions(
-            client_id, from_date=from_dt, to_date=to_dt, bank_codes=bank_codes
+            client_id, from_date=from_dt, to_date=to_dt, bank_codes=bank_codes, accounts=accounts
         )
         
         # If no real transactions but have linked accounts, show demo transactions
@@ -220,7 +267,8 @@ async def aggregate_transactions(
         
         # Check if we have real account data
         try:
-            real_accounts = await AggregationService.get_accounts(client_id)
+            # Accounts fetched above cover all banks unless filtered by bank
+            real_accounts = accounts if bank_codes is None else await AggregationService.get_accounts(client_id)
             has_real_accounts = len(real_accounts) > 0
         except Exception:
             has_real_accounts = False
@@ -232,18 +280,19 @@ async def aggregate_transactions(
             linked_banks = AccountLinkingService.get_banks_for_client(client_id)
             # Only show demo if we have linked accounts but couldn't get real data
             # Generate demo transactions
+            now = datetime.now()
             for i, acc in enumerate(linked_accounts[:3]):  # Max 3 accounts
                 for j in range(5):  # 5 transactions per account
-                    date = datetime.now() - timedelta(days=j*2)
-                    demo_txn = type('Transaction', (), {
-                        'transaction_id': f"demo-txn-{acc['bank']}-{i}-{j}",
-                        'account_id': acc['account_number'],
-                        'amount': str(-(1000 + j*500)),
-                        'currency': 'RUB',
-                        'booking_date': date.isoformat(),
-                        'description': ['Покупка в магазине', 'Транспорт', 'Ресторан', 'Аптека', 'Развлечения'][j],
-                        'mcc': ['5411', '4111', '5812', '5912', '7832'][j],
-                    })()
+                    date = now - timedelta(days=j*2)
+                    demo_txn = Transaction(
+                        transaction_id=f"demo-txn-{acc['bank']}-{i}-{j}",
+                        account_id=acc['account_number'],
+                        amount=str(-(1000 + j*500)),
+                        currency='RUB',
+                        booking_date=date.isoformat(),
+                        description=['Покупка в магазине', 'Транспорт', 'Ресторан', 'Аптека', 'Развлечения'][j],
+                        mcc=['5411', '4111', '5812', '5912', '7832'][j],
+                    )
                     transactions.append(demo_txn)
         elif len(transactions) == 0 and has_real_accounts:
             # Have real accounts but no transactions - show empty list (real data)
@@ -266,6 +315,68 @@ async def aggregate_transactions(
         raise HTTPException(status_code=500, detail=f"Failed to aggregate transactions: {str(e)}")
 
 
+@router.get("/transactions/aggregate/stream")
+async def aggregate_transactions_stream(
+    client_id: str = Query(..., description="Client ID"),
+    from_date: Optional[str] = Query(
+        None, description="Start date (ISO format, e.g., 2024-01-01T00:00:00)"
+    ),
+    to_date: Optional[str] = Query(
+        None, description="End date (ISO format, e.g., 2024-01-31T23:59:59)"
+    ),
+    bank: Optional[str] = Query(None, description="Filter by specific bank (vbank, abank, sbank)"),
+) -> StreamingResponse:
+    """Stream aggregated transactions as newline-delimited JSON.
+
+    Each bank's transactions are sent as soon as that bank responds, so the
+    client does not wait for the slowest bank. Demo transactions are not
+    streamed; use /transactions/aggregate for those.
+
+    Args:
+        client_id: Client ID
+        from_date: Start date (ISO format)
+        to_date: End date (ISO format)
+        bank: Optional bank code to filter by
+
+    Returns:
+        NDJSON stream of unified transactions (one TransactionResponse per line)
+    """
+    # Validate inputs
+    client_id = validate_client_id(client_id)
+    bank_codes = None
+    if bank:
+        bank_codes = [validate_bank_code(bank)]
+
+    # Parse and validate dates
+    from_dt = None
+    to_dt = None
+    if from_date:
+        from_dt = validate_date_format(from_date)
+    if to_date:
+        to_dt = validate_date_format(to_date)
+
+    # Validate date range
+    if from_dt and to_dt and from_dt > to_dt:
+        raise HTTPException(status_code=400, detail="from_date must be before to_date")
+
+    async def transaction_lines():
+        async for txn in AggregationService.get_transactions_stream(
+            client_id, from_date=from_dt, to_date=to_dt, bank_codes=bank_codes
+        ):
+            transaction = TransactionResponse(
+                transaction_id=txn.transaction_id,
+                account_id=txn.account_id,
+                amount=txn.amount,
+                currency=txn.currency,
+                booking_date=txn.booking_date,
+                description=txn.description,
+                mcc=txn.mcc,
+            )
+            yield transaction.model_dump_json() + "\n"
+
+    return StreamingResponse(transaction_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/analytics/summary", response_model=AnalyticsSummaryResponse)
 async def get_analytics_summary(
     client_id: str = Query(..., description="Client ID"),
@@ -390,6 +501,8 @@ async def link_account(
             account_id=request.account_id,
             nickname=request.nickname,
         )
+        # Cached summaries were built for the old set of accounts
+        AnalyticsService.invalidate(client_id)
         
         return LinkedAccountResponse(
             id=linked_account["id"],
@@ -458,6 +571,7 @@ async def unlink_account(
         success = AccountLinkingService.unlink_account(client_id, account_id)
         if not success:
             raise HTTPException(status_code=404, detail="Account not found")
+        AnalyticsService.invalidate(client_id)
         return {"success": True}
     except HTTPException:
         raise
@@ -492,25 +606,22 @@ async def test_balances_manual(request: TestBalancesRequest) -> dict:
     
     try:
         client = get_bank_client(bank_lower)
-        try:
-            # Make direct request to bank API
-            balances_response = await client.get_balances(
-                bank_token=request.access_token,
-                account_id=request.account_id,
-                client_id=client_id,
-                requesting_bank=settings.requesting_bank_id,
-                consent_id=request.consent_id,
-            )
-            return {
-                "success": True,
-                "bank": bank_lower,
-                "account_id": request.account_id,
-                "client_id": client_id,
-                "consent_id": request.consent_id,
-                "response": balances_response,
-            }
-        finally:
-            await client.close()
+        # Make direct request to bank API
+        balances_response = await client.get_balances(
+            bank_token=request.access_token,
+            account_id=request.account_id,
+            client_id=client_id,
+            requesting_bank=settings.requesting_bank_id,
+            consent_id=request.consent_id,
+        )
+        return {
+            "success": True,
+            "bank": bank_lower,
+            "account_id": request.account_id,
+            "client_id": client_id,
+            "consent_id": request.consent_id,
+            "response": balances_response,
+        }
     except BankAPIError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
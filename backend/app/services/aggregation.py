@@ -1,16 +1,134 @@
 """Service for aggregating data from multiple banks."""
 import asyncio
+from collections import defaultdict
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 from app.clients.factory import get_all_bank_clients, get_bank_client
-from app.core.exceptions import ConsentRequiredError
+from app.core.exceptions import BankAPIError, ConsentRequiredError
 from app.core.types import Account, Balance, Transaction
 from app.services.consent_service import ConsentService
 from app.services.token_service import TokenService
 from app.services.account_linking import AccountLinkingService
+from app.services.cache import ACCOUNTS_TTL, BALANCES_TTL, TRANSACTIONS_TTL, cached
 from app.settings import settings
 
 
+# Supported bank codes, in default query order
+_BANK_CODES: tuple[str, ...] = ("vbank", "abank", "sbank")
+
+# Banks with credentials configured, computed once at import (settings are loaded once)
+_CONFIGURED_BANKS: frozenset[str] = frozenset(
+    bank
+    for bank in _BANK_CODES
+    if getattr(settings, f"{bank}_client_id", None) and getattr(settings, f"{bank}_client_secret", None)
+)
+
+# Max concurrent requests to one bank, shared by all requests in this process
+_BANK_CONCURRENCY = 8
+_bank_sems: dict[str, asyncio.Semaphore] = {}
+
+# Retries on HTTP 429 with exponential backoff: 0.5s, 1s, 2s
+_RATE_LIMIT_RETRIES = 3
+_RATE_LIMIT_BACKOFF = 0.5
+
+
+def _bank_semaphore(bank_code: str) -> asyncio.Semaphore:
+    """Get semaphore limiting concurrent requests to a bank.
+
+    Args:
+        bank_code: Bank code
+
+    Returns:
+        Semaphore shared by all requests to this bank
+    """
+    sem = _bank_sems.get(bank_code)
+    if sem is None:
+        sem = _bank_sems[bank_code] = asyncio.Semaphore(_BANK_CONCURRENCY)
+    return sem
+
+
+async def _retry_on_rate_limit(coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Call bank API, retrying with exponential backoff on HTTP 429.
+
+    Args:
+        coro_factory: Zero-argument callable returning the API call coroutine
+
+    Returns:
+        API response
+
+    Raises:
+        BankAPIError: If request fails or is still rate limited after all retries
+    """
+    for attempt in range(_RATE_LIMIT_RETRIES):
+        try:
+            return await coro_factory()
+        except BankAPIError as e:
+            if e.status_code != 429:
+                raise
+        await asyncio.sleep(_RATE_LIMIT_BACKOFF * 2 ** attempt)
+    return await coro_factory()
+
+
+def _consent_renewer(bank_code: str, client_id: str) -> Callable[[], Awaitable[Optional[str]]]:
+    """Build a function that replaces a rejected consent at most once.
+
+    The first call clears the stored consent and requests a new one; later and
+    concurrent calls share that request's result.
+
+    Args:
+        bank_code: Bank code
+        client_id: Client ID
+
+    Returns:
+        Zero-argument coroutine function returning the new consent ID, or None
+        if the new consent is pending or could not be created
+    """
+    renewal: Optional[asyncio.Task] = None
+
+    async def renew() -> Optional[str]:
+        nonlocal renewal
+        if renewal is None:
+            ConsentService.clear_consent_id(client_id, bank_code)
+            renewal = asyncio.ensure_future(
+                ConsentService.ensure_consent(
+                    bank_code=bank_code,
+                    client_id=client_id,
+                    permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
+                )
+            )
+        consent_id, _ = await asyncio.shield(renewal)
+        return consent_id
+
+    return renew
+
+
+# Banks without the batch balances endpoint (404/405/501 or a response of the
+# wrong shape); they are queried per account from then on
+_BATCH_BALANCES_UNSUPPORTED: set[str] = set()
+
+
+# Request-scoped cache of get_accounts results: (client_id, bank codes) -> accounts
+# Set per request by the request_accounts_cache dependency; None outside a request
+_request_accounts_cache: ContextVar[Optional[dict[tuple[str, tuple[str, ...]], list[Account]]]] = ContextVar(
+    "request_accounts_cache", default=None
+)
+
+
+async def request_accounts_cache() -> AsyncIterator[None]:
+    """FastAPI dependency that shares get_accounts results within one request.
+
+    Endpoints that fetch accounts and then balances/transactions otherwise
+    repeat all token/consent/HTTP work for the same accounts.
+    """
+    token = _request_accounts_cache.set({})
+    try:
+        yield
+    finally:
+        _request_accounts_cache.reset(token)
+
+
 def _has_bank_credentials(bank_code: str) -> bool:
     """Check if bank has credentials configured.
     
@@ -20,14 +138,43 @@ def _has_bank_credentials(bank_code: str) -> bool:
     Returns:
         True if credentials are configured, False otherwise
     """
-    bank_code_lower = bank_code.lower()
-    if bank_code_lower == "vbank":
-        return bool(settings.vbank_client_id and settings.vbank_client_secret)
-    elif bank_code_lower == "abank":
-        return bool(settings.abank_client_id and settings.abank_client_secret)
-    elif bank_code_lower == "sbank":
-        return bool(settings.sbank_client_id and settings.sbank_client_secret)
-    return False
+    return bank_code.lower() in _CONFIGURED_BANKS
+
+
+@lru_cache(maxsize=64)
+def _make_account_normalizer(
+    bank_code: str, id_key: str, type_key: str
+) -> Callable[[dict], Account]:
+    """Build an account normalizer specialized for one response shape.
+
+    Banks return a consistent schema (camelCase or snake_case), so the key
+    names are resolved once per shape instead of per record.
+
+    Args:
+        bank_code: Bank code
+        id_key: Key holding the account ID ("accountId" or "account_id")
+        type_key: Key holding the account type ("accountType" or "account_type")
+
+    Returns:
+        Function normalizing raw account data to Account
+    """
+    def normalize(account_data: dict) -> Account:
+        account_id = account_data.get(id_key)
+        account_type = account_data.get(type_key)
+        if not account_id or not account_type:
+            # Record does not match the detected shape - use the generic path
+            return AggregationService._normalize_account(account_data, bank_code)
+
+        return Account(
+            account_id=account_id,
+            bank=bank_code,
+            currency=account_data.get("currency", "RUB"),
+            account_type=account_type,
+            nickname=account_data.get("nickname"),
+            servicer=account_data.get("servicer"),
+        )
+
+    return normalize
 
 
 class AggregationService:
@@ -58,6 +205,29 @@ class AggregationService:
             servicer=account_data.get("servicer"),
         )
 
+    @staticmethod
+    def _normalize_accounts(accounts_list: list[dict], bank_code: str) -> list[Account]:
+        """Normalize a batch of account records from one bank response.
+
+        Args:
+            accounts_list: Raw account data from bank API
+            bank_code: Bank code
+
+        Returns:
+            Normalized Account objects
+        """
+        if not accounts_list:
+            return []
+
+        # Detect the response shape from the first record
+        first = accounts_list[0]
+        normalize = _make_account_normalizer(
+            bank_code,
+            "accountId" if first.get("accountId") else "account_id",
+            "accountType" if first.get("accountType") else "account_type",
+        )
+        return [normalize(account_data) for account_data in accounts_list]
+
     @staticmethod
     def _normalize_balance(balance_data: dict, account_id: str) -> Balance:
         """Normalize balance data to unified format.
@@ -115,697 +285,1127 @@ class AggregationService:
         )
 
     @staticmethod
-    async def get_accounts(
-        client_id: str, bank_codes: Optional[list[str]] = None
-    ) -> list[Account]:
-        """Aggregate accounts from all banks.
+    def _parse_accounts_response(accounts_response: dict, bank_code: str) -> list[dict]:
+        """Extract raw account records from a bank accounts response.
 
         Args:
-            client_id: Client ID
-            bank_codes: List of bank codes to query (None = all banks or linked banks)
+            accounts_response: Raw accounts response from bank API
+            bank_code: Bank code (for logging)
 
         Returns:
-            List of normalized accounts
+            List of raw account dicts
         """
-        # If no bank codes specified, use linked accounts or all banks
-        if bank_codes is None:
-            linked_banks = AccountLinkingService.get_banks_for_client(client_id)
-            bank_codes = linked_banks if linked_banks else ["vbank", "abank", "sbank"]
-
-        all_accounts: list[Account] = []
-        
         import logging
         logger = logging.getLogger(__name__)
 
-        for bank_code in bank_codes:
-            # Check if credentials are available
-            if not _has_bank_credentials(bank_code):
-                # Skip this bank if no credentials - will use demo data later
-                logger.info(f"Skipping {bank_code}: no credentials configured")
-                continue
-            
-            logger.info(f"Attempting to get accounts from {bank_code} for client {client_id}")
-                
-            try:
-                # Step 1: Get bank token for interbank requests
-                # POST /auth/bank-token?client_id=team268&client_secret=...
-                token_data = await TokenService.get_bank_token(bank_code)
-                bank_token = token_data["access_token"]
+        # API returns accounts in data.account (not data.accounts)
+        # Handle both formats: {"data": {"account": [...]}} and {"accounts": [...]}
+        accounts_list = []
+        
+        # Debug: log the response structure
+        logger.info(f"🔍 Parsing accounts response from {bank_code}: keys={list(accounts_response.keys())}")
+        
+        # Try data.account first (most common format)
+        data_section = accounts_response.get("data")
+        if data_section:
+            logger.info(f"🔍 Found 'data' section: type={type(data_section)}, keys={list(data_section.keys()) if isinstance(data_section, dict) else 'N/A'}")
+            if isinstance(data_section, dict):
+                # Try data.account (single account or list)
+                account_data = data_section.get("account")
+                if account_data:
+                    logger.info(f"🔍 Found 'account' in data: type={type(account_data)}, length={len(account_data) if isinstance(account_data, list) else 1 if isinstance(account_data, dict) else 'N/A'}")
+                    if isinstance(account_data, list):
+                        accounts_list = account_data
+                        logger.info(f"✅ Extracted {len(accounts_list)} accounts from list")
+                    elif isinstance(account_data, dict):
+                        accounts_list = [account_data]
+                        logger.info(f"✅ Wrapped single account dict into list")
+                    else:
+                        logger.warning(f"⚠️ Unexpected account data type: {type(account_data)}, value={account_data}")
+                else:
+                    logger.warning(f"⚠️ 'account' key not found in data section. Available keys: {list(data_section.keys())}")
+            else:
+                logger.warning(f"⚠️ 'data' section is not a dict: {type(data_section)}")
+        else:
+            logger.warning(f"⚠️ 'data' key not found in response. Available keys: {list(accounts_response.keys())}")
+        
+        # Fallback to top-level accounts
+        if not accounts_list:
+            accounts_list = accounts_response.get("accounts", [])
+            if accounts_list:
+                logger.info(f"🔍 Found 'accounts' at top level: {len(accounts_list)} items")
+        
+        # Ensure accounts_list is a list
+        if not isinstance(accounts_list, list):
+            logger.warning(f"accounts_list is not a list: {type(accounts_list)}, value={accounts_list}")
+            accounts_list = []
 
-                client = get_bank_client(bank_code)
-                try:
-                    # Step 3: Get accounts (interbank request)
-                    # GET /accounts?client_id=team268-1
-                    # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268
-                    # Note: X-Consent-Id will be added if consent is required and created
-                    accounts_response = await asyncio.wait_for(
-                        client.get_accounts(
-                            bank_token=bank_token,
-                            client_id=client_id,
-                            requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
-                        ),
-                        timeout=5.0  # 5 second timeout for getting accounts
-                    )
+        return accounts_list
 
-                    # API returns accounts in data.account (not data.accounts)
-                    # Handle both formats: {"data": {"account": [...]}} and {"accounts": [...]}
-                    accounts_list = []
-                    
-                    # Debug: log the response structure
-                    logger.info(f"🔍 Parsing accounts response from {bank_code} (before consent): keys={list(accounts_response.keys())}")
-                    
-                    # Try data.account first (most common format)
-                    data_section = accounts_response.get("data")
-                    if data_section:
-                        logger.info(f"🔍 Found 'data' section: type={type(data_section)}, keys={list(data_section.keys()) if isinstance(data_section, dict) else 'N/A'}")
-                        if isinstance(data_section, dict):
-                            # Try data.account (single account or list)
-                            account_data = data_section.get("account")
-                            if account_data:
-                                logger.info(f"🔍 Found 'account' in data: type={type(account_data)}, length={len(account_data) if isinstance(account_data, list) else 1 if isinstance(account_data, dict) else 'N/A'}")
-                                if isinstance(account_data, list):
-                                    accounts_list = account_data
-                                    logger.info(f"✅ Extracted {len(accounts_list)} accounts from list")
-                                elif isinstance(account_data, dict):
-                                    accounts_list = [account_data]
-                                    logger.info(f"✅ Wrapped single account dict into list")
-                                else:
-                                    logger.warning(f"⚠️ Unexpected account data type: {type(account_data)}, value={account_data}")
-                            else:
-                                logger.warning(f"⚠️ 'account' key not found in data section. Available keys: {list(data_section.keys())}")
-                        else:
-                            logger.warning(f"⚠️ 'data' section is not a dict: {type(data_section)}")
-                    else:
-                        logger.warning(f"⚠️ 'data' key not found in response. Available keys: {list(accounts_response.keys())}")
-                    
-                    # Fallback to top-level accounts
-                    if not accounts_list:
-                        accounts_list = accounts_response.get("accounts", [])
-                        if accounts_list:
-                            logger.info(f"🔍 Found 'accounts' at top level: {len(accounts_list)} items")
-                    
-                    # Ensure accounts_list is a list
-                    if not isinstance(accounts_list, list):
-                        logger.warning(f"accounts_list is not a list: {type(accounts_list)}, value={accounts_list}")
-                        accounts_list = []
-                    
-                    logger.info(f"Got {len(accounts_list)} accounts from {bank_code} (before consent)")
-                    if len(accounts_list) == 0:
-                        logger.warning(f"⚠️ No accounts parsed from {bank_code} response (before consent). Full response: {accounts_response}")
-                        # Check if we have linked accounts for this bank
-                        linked_accounts_for_bank = [acc for acc in AccountLinkingService.get_linked_accounts(client_id) if acc['bank'] == bank_code]
-                        if linked_accounts_for_bank:
-                            logger.info(f"Found {len(linked_accounts_for_bank)} linked accounts for {bank_code}, will use them for balances/transactions")
-                    else:
-                        logger.info(f"✅ Successfully parsed {len(accounts_list)} accounts from {bank_code} (before consent)")
-                        for account_data in accounts_list:
-                            normalized = AggregationService._normalize_account(
-                                account_data, bank_code
-                            )
-                            all_accounts.append(normalized)
-                            logger.info(f"✅ Account from {bank_code}: account_id={normalized.account_id}, type={normalized.account_type}, currency={normalized.currency}, nickname={normalized.nickname}")
+    @staticmethod
+    async def _create_accounts_consent(
+        bank_code: str, client_id: str
+    ) -> tuple[Optional[str], bool]:
+        """Create consent for interbank access to accounts, balances and transactions.
 
-                except ConsentRequiredError:
-                    # Step 2: Create consent for interbank access
-                    # POST /account-consents/request
-                    # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268
-                    # Body: { permissions: [...], client_id: "team268-1", requesting_bank: "team268" }
-                    try:
-                        # Add timeout for consent creation
-                        consent_response = await asyncio.wait_for(
-                            ConsentService.request_accounts_consent(
-                                bank_code=bank_code,
-                                client_id=client_id,
-                                permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
-                            ),
-                            timeout=5.0  # 5 second timeout for consent creation
-                        )
-                        
-                        consent_status = consent_response.get("status", "")
-                        consent_id = consent_response.get("consent_id")
-                        request_id = consent_response.get("request_id")
-                        auto_approved = consent_response.get("auto_approved", False)
-                        
-                        # Check if consent was automatically approved (VBank, ABank)
-                        if consent_status == "approved" and consent_id and auto_approved:
-                            logger.info(f"✅ Consent approved for {bank_code}, consent_id={consent_id}, retrying accounts request")
-                            # Retry Step 3 with consent_id
-                            # GET /accounts?client_id=team268-1
-                            # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268, X-Consent-Id: <consent_id>
-                            accounts_response = await asyncio.wait_for(
-                                client.get_accounts(
-                                    bank_token=bank_token,
-                                    client_id=client_id,
-                                    requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
-                                    consent_id=consent_id,  # Required for interbank requests
-                                ),
-                                timeout=5.0  # 5 second timeout for getting accounts
-                            )
+        Goes through ConsentService.ensure_consent, so concurrent callers for the
+        same client and bank share one consent request.
 
-                            # API returns accounts in data.account (not data.accounts)
-                            # Handle both formats: {"data": {"account": [...]}} and {"accounts": [...]}
-                            accounts_list = []
-                            
-                            # Debug: log the response structure
-                            logger.info(f"🔍 Parsing accounts response from {bank_code}: keys={list(accounts_response.keys())}")
-                            
-                            # Try data.account first (most common format)
-                            data_section = accounts_response.get("data")
-                            if data_section:
-                                logger.info(f"🔍 Found 'data' section: type={type(data_section)}, keys={list(data_section.keys()) if isinstance(data_section, dict) else 'N/A'}")
-                                if isinstance(data_section, dict):
-                                    # Try data.account (single account or list)
-                                    account_data = data_section.get("account")
-                                    if account_data:
-                                        logger.info(f"🔍 Found 'account' in data: type={type(account_data)}, length={len(account_data) if isinstance(account_data, list) else 1 if isinstance(account_data, dict) else 'N/A'}")
-                                        if isinstance(account_data, list):
-                                            accounts_list = account_data
-                                            logger.info(f"✅ Extracted {len(accounts_list)} accounts from list")
-                                        elif isinstance(account_data, dict):
-                                            accounts_list = [account_data]
-                                            logger.info(f"✅ Wrapped single account dict into list")
-                                        else:
-                                            logger.warning(f"⚠️ Unexpected account data type: {type(account_data)}, value={account_data}")
-                                    else:
-                                        logger.warning(f"⚠️ 'account' key not found in data section. Available keys: {list(data_section.keys())}")
-                                else:
-                                    logger.warning(f"⚠️ 'data' section is not a dict: {type(data_section)}")
-                            else:
-                                logger.warning(f"⚠️ 'data' key not found in response. Available keys: {list(accounts_response.keys())}")
-                            
-                            # Fallback to top-level accounts
-                            if not accounts_list:
-                                accounts_list = accounts_response.get("accounts", [])
-                                if accounts_list:
-                                    logger.debug(f"Found 'accounts' at top level: {len(accounts_list)} items")
-                            
-                            # Ensure accounts_list is a list
-                            if not isinstance(accounts_list, list):
-                                logger.warning(f"accounts_list is not a list: {type(accounts_list)}, value={accounts_list}")
-                                accounts_list = []
-                            
-                            logger.info(f"Got {len(accounts_list)} accounts from {bank_code} (after consent, consent_id={consent_id})")
-                            if len(accounts_list) == 0:
-                                logger.warning(f"⚠️ No accounts parsed from {bank_code} response. Full response: {accounts_response}")
-                            else:
-                                logger.info(f"✅ Successfully parsed {len(accounts_list)} accounts from {bank_code}")
-                            if len(accounts_list) > 0:
-                                for account_data in accounts_list:
-                                    normalized = AggregationService._normalize_account(
-                                        account_data, bank_code
-                                    )
-                                    all_accounts.append(normalized)
-                                    logger.info(f"✅ Account from {bank_code}: account_id={normalized.account_id}, type={normalized.account_type}, currency={normalized.currency}, nickname={normalized.nickname}")
-                            else:
-                                logger.warning(f"API returned 0 accounts from {bank_code} for client {client_id} even after consent approval. Full response: {accounts_response}")
-                                # Check if we have linked accounts for this bank that we can use
-                                linked_accounts_for_bank = [acc for acc in AccountLinkingService.get_linked_accounts(client_id) if acc['bank'] == bank_code]
-                                if linked_accounts_for_bank:
-                                    logger.info(f"Will use {len(linked_accounts_for_bank)} linked accounts for {bank_code} to get balances/transactions directly")
-                                    for linked_acc in linked_accounts_for_bank:
-                                        logger.info(f"Linked account: bank={linked_acc['bank']}, account_number={linked_acc['account_number']}, account_id={linked_acc.get('account_id', 'N/A')}")
-                        elif consent_status == "pending" and request_id:
-                            # Consent requires manual approval (SBank)
-                            # Skip this bank for now - user needs to approve consent in bank
-                            # Will use demo data instead
-                            pass
-                    except asyncio.TimeoutError:
-                        # Skip this bank if consent creation or account retrieval times out
-                        logger.warning(f"Timeout creating consent or getting accounts from {bank_code} for client {client_id}")
-                        pass
-                    except Exception as e:
-                        # Skip this bank if consent creation fails
-                        logger.error(f"Error creating consent or getting accounts from {bank_code} for client {client_id}: {e}")
-                        pass
-                except asyncio.TimeoutError:
-                    # Skip this bank if request times out
-                    logger.warning(f"Timeout getting accounts from {bank_code} for client {client_id}")
-                    pass
-                except Exception as e:
-                    # Skip this bank if request fails
-                    logger.error(f"Error getting accounts from {bank_code} for client {client_id}: {e}")
-                    pass
-                finally:
-                    await client.close()
-
-            except Exception:
-                # Skip this bank if token retrieval fails
-                pass
+        Args:
+            bank_code: Bank code
+            client_id: Client ID
 
-        # If no real accounts but have linked accounts, generate demo accounts
-        if len(all_accounts) == 0:
-            linked_accounts = AccountLinkingService.get_linked_accounts(client_id)
-            if linked_accounts:
-                for acc in linked_accounts:
-                    # Only generate demo for banks that were requested
-                    if acc['bank'] in bank_codes:
-                        demo_account = Account(
-                            account_id=acc['account_number'],
-                            bank=acc['bank'],
-                            currency="RUB",
-                            account_type="current",
-                            nickname=acc.get('nickname', f"Счет {acc['account_number'][-4:]}")
-                        )
-                        all_accounts.append(demo_account)
+        Returns:
+            Tuple of (consent ID if already stored or approved automatically
+            (VBank, ABank), whether the consent is pending manual approval
+            (SBank)); the consent ID is also None if the request failed
+        """
+        import logging
+        logger = logging.getLogger(__name__)
 
-        return all_accounts
+        # POST /account-consents/request, shared with concurrent callers for this client and bank
+        # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268
+        # Body: { permissions: [...], client_id: "team268-1", requesting_bank: "team268" }
+        try:
+            async with asyncio.timeout(5.0):  # 5 second timeout for consent creation
+                consent_id, pending = await ConsentService.ensure_consent(
+                    bank_code=bank_code,
+                    client_id=client_id,
+                    permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout creating consent for {bank_code}, client {client_id}")
+            return None, False
+        except Exception as e:
+            logger.error(f"Error creating consent for {bank_code}, client {client_id}: {e}")
+            return None, False
+
+        if consent_id:
+            # Approved automatically (VBank, ABank)
+            logger.info(f"✅ Consent approved for {bank_code}, consent_id={consent_id}")
+        elif pending:
+            # Consent requires manual approval (SBank) - user needs to approve it in the bank
+            logger.info(f"Consent for {bank_code} is pending manual approval")
+        return consent_id, pending
 
     @staticmethod
-    async def get_balances(
-        client_id: str,
-        account_ids: Optional[list[str]] = None,
-        bank_codes: Optional[list[str]] = None,
-    ) -> list[Balance]:
-        """Aggregate balances for accounts.
+    async def _fetch_accounts_for_bank(
+        bank_code: str, client_id: str, linked_accounts: Optional[list[dict]] = None
+    ) -> list[Account]:
+        """Fetch accounts from a single bank.
 
         Args:
+            bank_code: Bank code
             client_id: Client ID
-            account_ids: Specific account IDs to query (None = all accounts)
-            bank_codes: List of bank codes to query (None = all banks)
+            linked_accounts: Client's linked accounts at this bank (used for diagnostics)
 
         Returns:
-            List of normalized balances
+            List of normalized accounts (empty if the bank is unavailable)
         """
-        # Get accounts from API
-        all_accounts = await AggregationService.get_accounts(client_id, bank_codes)
-        
-        # Also get linked accounts - they may have account_number that we can use directly
         import logging
-        logger_bal = logging.getLogger(__name__)
-        linked_accounts = AccountLinkingService.get_linked_accounts(client_id)
-        logger_bal.info(f"Got {len(all_accounts)} accounts from API and {len(linked_accounts)} linked accounts for balances")
-        
-        # Build account_ids list from API accounts
-        api_account_ids = [acc.account_id for acc in all_accounts]
-        
-        # Also add account_numbers from linked accounts that have account_id set
-        # If linked account has account_id, use it; if not, use account_number as account_id
-        linked_account_ids = []
-        for linked_acc in linked_accounts:
-            if linked_acc.get('account_id'):
-                linked_account_ids.append(linked_acc['account_id'])
-            else:
-                # Use account_number as account_id for direct API queries
-                linked_account_ids.append(linked_acc['account_number'])
-        
-        # Combine API account IDs and linked account IDs
-        if account_ids is None:
-            # Use all available account IDs (from API and linked accounts)
-            account_ids = list(set(api_account_ids + linked_account_ids))
-        else:
-            # Filter to only requested account_ids
-            account_ids = [acc_id for acc_id in account_ids if acc_id in api_account_ids or acc_id in linked_account_ids]
+        logger = logging.getLogger(__name__)
 
-        all_balances: list[Balance] = []
+        if linked_accounts is None:
+            linked_accounts = []
 
-        # Group accounts by bank
-        # First, use accounts from API
-        accounts_by_bank: dict[str, list[str]] = {}
-        for account in all_accounts:
-            if account.account_id in account_ids:
-                if account.bank not in accounts_by_bank:
-                    accounts_by_bank[account.bank] = []
-                accounts_by_bank[account.bank].append(account.account_id)
+        accounts: list[Account] = []
+
+        # Check if credentials are available
+        if not _has_bank_credentials(bank_code):
+            # Skip this bank if no credentials - will use demo data later
+            logger.info(f"Skipping {bank_code}: no credentials configured")
+            return accounts
         
-        # Also add linked accounts - use their bank and account_number/account_id
-        for linked_acc in linked_accounts:
-            bank_code = linked_acc['bank']
-            acc_id = linked_acc.get('account_id') or linked_acc['account_number']
-            if acc_id in account_ids:
-                if bank_code not in accounts_by_bank:
-                    accounts_by_bank[bank_code] = []
-                if acc_id not in accounts_by_bank[bank_code]:
-                    accounts_by_bank[bank_code].append(acc_id)
-                    logger_bal.info(f"Added linked account {acc_id} from {bank_code} to balances query")
+        logger.info(f"Attempting to get accounts from {bank_code} for client {client_id}")
+            
+        try:
+            # Step 1: Get bank token for interbank requests
+            # POST /auth/bank-token?client_id=team268&client_secret=...
+            token_data = await TokenService.get_bank_token(bank_code)
+            bank_token = token_data["access_token"]
 
-        # Get balances for each bank
-        # Note: We assume consent was already created in get_accounts step
-        # If consent is missing, we'll get 403 and skip this account
-        for bank_code, acc_ids in accounts_by_bank.items():
-            # Check if credentials are available
-            if not _has_bank_credentials(bank_code):
-                continue
-                
-            try:
-                # Step 1: Get bank token with timeout protection
-                try:
-                    token_data = await asyncio.wait_for(
-                        TokenService.get_bank_token(bank_code),
-                        timeout=5.0  # 5 second timeout per bank
-                    )
-                    bank_token = token_data["access_token"]
-                except asyncio.TimeoutError:
-                    # Skip this bank if token request times out
-                    continue
+            # Step 2: Make sure we have a consent before asking for accounts
+            # Reuse a cached consent, otherwise create one up front instead of
+            # letting the bank reject the first request with 403
+            consent_id = ConsentService.get_consent_id(client_id, bank_code)
+            if not consent_id:
+                consent_id, pending = await AggregationService._create_accounts_consent(bank_code, client_id)
+                if pending:
+                    # Consent pending manual approval (SBank) - will use demo data
+                    return accounts
+                # If the consent request failed, still try: the bank may not
+                # require a consent, and a 403 lands in the safety net below
 
-                client = get_bank_client(bank_code)
+            client = get_bank_client(bank_code)
+            try:
+                # Step 3: Get accounts (interbank request)
+                # GET /accounts?client_id=team268-1
+                # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268, X-Consent-Id: <consent_id>
                 try:
-                    # Step 3: Get balances (interbank request)
-                    # GET /accounts/{id}/balances?client_id=team268-1
-                    # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268
-                    # Note: X-Consent-Id should be included if consent was created
-                    # Get consent_id if available (was created when getting accounts)
-                    consent_id = ConsentService.get_consent_id(client_id, bank_code)
-                    if consent_id:
-                        logger_bal.info(f"✅ Found consent_id={consent_id} for {bank_code}, client_id={client_id}")
-                    else:
-                        logger_bal.warning(f"⚠️ No consent_id found for {bank_code}, client_id={client_id} - will try to create one")
-                    logger_bal.info(f"Getting balances from {bank_code} for {len(acc_ids)} accounts, consent_id={'present' if consent_id else 'missing'}")
-                    
-                    # If no consent_id, try to create consent (should have been created in get_accounts, but just in case)
-                    if not consent_id:
-                        logger_bal.warning(f"No consent_id found for {bank_code}, attempting to create consent")
-                        try:
-                            consent_response = await ConsentService.request_accounts_consent(
-                                bank_code=bank_code,
+                    accounts_response = await cached(
+                        ("accounts", bank_code, client_id),
+                        ACCOUNTS_TTL,
+                        lambda: _retry_on_rate_limit(
+                            lambda: client.get_accounts(
+                                bank_token=bank_token,
                                 client_id=client_id,
-                                permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
-                            )
-                            consent_id = consent_response.get("consent_id")
-                            if consent_id:
-                                logger_bal.info(f"Created consent for {bank_code}, consent_id={consent_id}")
-                        except Exception as e:
-                            logger_bal.error(f"Failed to create consent for {bank_code}: {e}")
-                    
-                    for account_id in acc_ids:
-                        try:
-                            logger_bal.info(f"🔍 Requesting balances for account {account_id} from {bank_code} with consent_id={consent_id}")
-                            balances_response = await asyncio.wait_for(
-                                client.get_balances(
-                                    bank_token=bank_token,
-                                    account_id=account_id,
-                                    client_id=client_id,
-                                    requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
-                                    consent_id=consent_id,  # Pass consent_id if available
-                                ),
-                                timeout=10.0  # Увеличено с 5 до 10 секунд
+                                requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
+                                consent_id=consent_id,  # Required for interbank requests
                             )
+                        ),
+                        timeout=5.0,  # 5 second timeout for getting accounts
+                    )
+                except ConsentRequiredError:
+                    # Safety net: cached consent expired or was revoked on the bank side
+                    logger.warning(f"Consent {consent_id} rejected by {bank_code} for client {client_id}, creating a new one")
+                    ConsentService.clear_consent_id(client_id, bank_code)
+                    consent_id, _ = await AggregationService._create_accounts_consent(bank_code, client_id)
+                    if not consent_id:
+                        return accounts
+                    async with asyncio.timeout(5.0):
+                        accounts_response = await client.get_accounts(
+                            bank_token=bank_token,
+                            client_id=client_id,
+                            requesting_bank=settings.requesting_bank_id,
+                            consent_id=consent_id,
+                        )
 
-                            # API may return balances in data.balances or data.balance
-                            # Handle both formats: {"data": {"balances": [...]}} and {"balances": [...]}
-                            data_section = balances_response.get("data", {})
-                            if isinstance(data_section, dict):
-                                balances_list = data_section.get("balances", data_section.get("balance", []))
-                                # If balance is a single dict, wrap it in a list
-                                if isinstance(balances_list, dict):
-                                    balances_list = [balances_list]
-                            else:
-                                balances_list = balances_response.get("balances", [])
-                            
-                            # Ensure balances_list is a list
-                            if not isinstance(balances_list, list):
-                                balances_list = []
-                            
-                            logger_bal.info(f"Got {len(balances_list)} balances for account {account_id} from {bank_code} (consent_id={'present' if consent_id else 'missing'})")
-                            if len(balances_list) == 0:
-                                logger_bal.warning(f"No balances returned for account {account_id} from {bank_code} - full response: {balances_response}")
-                            for balance_data in balances_list:
-                                # Log raw balance data for debugging
-                                logger_bal.debug(f"Raw balance_data for {account_id}: {balance_data}")
-                                normalized = AggregationService._normalize_balance(
-                                    balance_data, account_id
-                                )
-                                all_balances.append(normalized)
-                                logger_bal.info(f"✅ REAL Balance for {account_id}: amount={normalized.amount}, currency={normalized.currency}, type={normalized.balance_type}")
-                        except ConsentRequiredError:
-                            # Consent required - try to create consent if not already created
-                            logger_bal.warning(f"Consent required for balances from {bank_code}, account {account_id}")
-                            if not consent_id:
-                                try:
-                                    consent_response = await ConsentService.request_accounts_consent(
-                                        bank_code=bank_code,
-                                        client_id=client_id,
-                                        permissions=["ReadBalances"],
-                                    )
-                                    consent_id = consent_response.get("consent_id")
-                                    if consent_id:
-                                        # Retry with consent_id
-                                        balances_response = await client.get_balances(
-                                            bank_token=bank_token,
-                                            account_id=account_id,
-                                            client_id=client_id,
-                                            requesting_bank=settings.requesting_bank_id,
-                                            consent_id=consent_id,
-                                        )
-                                        # API may return balances in data.balances or data.balance
-                                        data_section = balances_response.get("data", {})
-                                        if isinstance(data_section, dict):
-                                            balances_list = data_section.get("balances", data_section.get("balance", []))
-                                            if isinstance(balances_list, dict):
-                                                balances_list = [balances_list]
-                                        else:
-                                            balances_list = balances_response.get("balances", [])
-                                        
-                                        if not isinstance(balances_list, list):
-                                            balances_list = []
-                                        
-                                        if len(balances_list) > 0:
-                                            for balance_data in balances_list:
-                                                normalized = AggregationService._normalize_balance(
-                                                    balance_data, account_id
-                                                )
-                                                all_balances.append(normalized)
-                                                logger_bal.info(f"✅ REAL Balance for {account_id}: {normalized.amount} {normalized.currency}")
-                                except Exception as e2:
-                                    logger_bal.error(f"Failed to create consent and retry: {e2}")
-                        except asyncio.TimeoutError:
-                            logger_bal.error(f"⏱️ Timeout getting balances for account {account_id} from {bank_code} (timeout=10s)")
-                            pass
-                        except Exception as e:
-                            # Skip this account if request fails
-                            logger_bal.error(f"❌ Error getting balances for account {account_id} from {bank_code}: {type(e).__name__}: {e}", exc_info=True)
-                            pass
-                finally:
-                    await client.close()
-            except Exception:
-                # Skip this bank if token retrieval fails
+                accounts_list = AggregationService._parse_accounts_response(accounts_response, bank_code)
+
+                logger.info(f"Got {len(accounts_list)} accounts from {bank_code} (consent_id={consent_id})")
+                if len(accounts_list) > 0:
+                    logger.info(f"✅ Successfully parsed {len(accounts_list)} accounts from {bank_code}")
+                    for normalized in AggregationService._normalize_accounts(accounts_list, bank_code):
+                        accounts.append(normalized)
+                        logger.info(f"✅ Account from {bank_code}: account_id={normalized.account_id}, type={normalized.account_type}, currency={normalized.currency}, nickname={normalized.nickname}")
+                else:
+                    logger.warning(f"API returned 0 accounts from {bank_code} for client {client_id}. Full response: {accounts_response}")
+                    # Check if we have linked accounts for this bank that we can use
+                    if linked_accounts:
+                        logger.info(f"Will use {len(linked_accounts)} linked accounts for {bank_code} to get balances/transactions directly")
+                        for linked_acc in linked_accounts:
+                            logger.info(f"Linked account: bank={linked_acc['bank']}, account_number={linked_acc['account_number']}, account_id={linked_acc.get('account_id', 'N/A')}")
+            except asyncio.TimeoutError:
+                # Skip this bank if request times out
+                logger.warning(f"Timeout getting accounts from {bank_code} for client {client_id}")
+                pass
+            except Exception as e:
+                # Skip this bank if request fails
+                logger.error(f"Error getting accounts from {bank_code} for client {client_id}: {e}")
                 pass
 
-        # IMPORTANT: Only generate demo balances if:
-        # 1. We got NO balances from API (all_balances is empty)
-        # 2. AND we have NO real accounts from API (API returned 0 accounts)
-        # 3. AND we have linked accounts (user manually linked accounts)
-        # In this case, we generate demo data because we can't get real data from API
-        if len(all_balances) == 0:
-            # Check if we got real accounts from API
-            has_real_accounts_from_api = len(all_accounts) > 0
-            
-            if not has_real_accounts_from_api and len(linked_accounts) > 0:
-                # No real accounts from API but have linked accounts - generate demo data
-                logger_bal.info(f"No real accounts from API, but have {len(linked_accounts)} linked accounts - generating demo balances")
-                for acc in linked_accounts:
-                    # Only generate demo for accounts that were requested
-                    if account_ids is None or acc['account_number'] in account_ids or (acc.get('account_id') and acc['account_id'] in account_ids):
-                        demo_balance = Balance(
-                            account_id=acc.get('account_id') or acc['account_number'],
-                            amount="50000.00",
-                            currency="RUB",
-                            balance_type="interimBooked"
-                        )
-                        all_balances.append(demo_balance)
-            elif has_real_accounts_from_api:
-                # We have real accounts but no balances - this indicates an error getting balances
-                logger_bal.warning(f"Have {len(all_accounts)} real accounts from API but got 0 balances - this indicates an error getting balances, NOT generating demo data")
-            else:
-                # No accounts, no linked accounts - nothing to show
-                logger_bal.info(f"No accounts from API and no linked accounts - returning empty balances")
+        except Exception:
+            # Skip this bank if token retrieval fails
+            pass
 
-        return all_balances
+        return accounts
 
     @staticmethod
-    async def get_transactions(
-        client_id: str,
-        from_date: Optional[datetime] = None,
-        to_date: Optional[datetime] = None,
-        account_ids: Optional[list[str]] = None,
-        bank_codes: Optional[list[str]] = None,
-    ) -> list[Transaction]:
-        """Aggregate transactions from all accounts.
+    def _resolve_bank_codes(client_id: str, bank_codes: Optional[list[str]]) -> list[str]:
+        """Resolve which banks to query for a client.
 
         Args:
             client_id: Client ID
-            from_date: Start date (default: 30 days ago)
-            to_date: End date (default: now)
-            account_ids: Specific account IDs to query (None = all accounts)
-            bank_codes: List of bank codes to query (None = all banks)
+            bank_codes: Requested bank codes (None = linked banks or all banks)
 
         Returns:
-            List of normalized transactions
+            List of bank codes
         """
-        if from_date is None:
-            from_date = datetime.now() - timedelta(days=30)
-        if to_date is None:
-            to_date = datetime.now()
+        # If no bank codes specified, use linked accounts or all banks
+        if bank_codes is None:
+            linked_banks = AccountLinkingService.get_banks_for_client(client_id)
+            bank_codes = linked_banks if linked_banks else list(_BANK_CODES)
+        return bank_codes
 
-        # Get accounts from API
-        all_accounts = await AggregationService.get_accounts(client_id, bank_codes)
-        
-        # Also get linked accounts - they may have account_number that we can use directly
-        import logging
-        logger_txn = logging.getLogger(__name__)
-        linked_accounts = AccountLinkingService.get_linked_accounts(client_id)
-        logger_txn.info(f"Got {len(all_accounts)} accounts from API and {len(linked_accounts)} linked accounts for transactions")
-        
-        # Build account_ids list from API accounts
-        api_account_ids = [acc.account_id for acc in all_accounts]
-        
-        # Also add account_numbers from linked accounts
-        linked_account_ids = []
-        for linked_acc in linked_accounts:
-            if linked_acc.get('account_id'):
-                linked_account_ids.append(linked_acc['account_id'])
-            else:
-                # Use account_number as account_id for direct API queries
-                linked_account_ids.append(linked_acc['account_number'])
-        
-        # Combine API account IDs and linked account IDs
-        if account_ids is None:
-            # Use all available account IDs (from API and linked accounts)
-            account_ids = list(set(api_account_ids + linked_account_ids))
-        else:
-            # Filter to only requested account_ids
-            account_ids = [acc_id for acc_id in account_ids if acc_id in api_account_ids or acc_id in linked_account_ids]
+    @staticmethod
+    def _linked_accounts_by_bank(client_id: str) -> defaultdict[str, list[dict]]:
+        """Index a client's linked accounts by bank code.
 
-        all_transactions: list[Transaction] = []
+        Args:
+            client_id: Client ID
+
+        Returns:
+            Mapping of bank code to linked accounts
+        """
+        linked_by_bank: defaultdict[str, list[dict]] = defaultdict(list)
+        for linked_acc in AccountLinkingService.get_linked_accounts(client_id):
+            linked_by_bank[linked_acc['bank']].append(linked_acc)
+        return linked_by_bank
+
+    @staticmethod
+    def _demo_accounts(
+        linked_by_bank: dict[str, list[dict]], bank_codes: list[str]
+    ) -> list[Account]:
+        """Build demo accounts from linked accounts of the requested banks.
+
+        Args:
+            linked_by_bank: Linked accounts indexed by bank code
+            bank_codes: Requested bank codes
+
+        Returns:
+            List of demo accounts
+        """
+        demo_accounts: list[Account] = []
+        # Only generate demo for banks that were requested
+        for bank_code in dict.fromkeys(bank_codes):
+            for acc in linked_by_bank.get(bank_code, []):
+                demo_accounts.append(
+                    Account(
+                        account_id=acc['account_number'],
+                        bank=acc['bank'],
+                        currency="RUB",
+                        account_type="current",
+                        nickname=acc.get('nickname', f"Счет {acc['account_number'][-4:]}")
+                    )
+                )
+        return demo_accounts
+
+    @staticmethod
+    async def get_accounts(
+        client_id: str, bank_codes: Optional[list[str]] = None
+    ) -> list[Account]:
+        """Aggregate accounts from all banks.
+
+        Args:
+            client_id: Client ID
+            bank_codes: List of bank codes to query (None = all banks or linked banks)
+
+        Returns:
+            List of normalized accounts
+        """
+        bank_codes = AggregationService._resolve_bank_codes(client_id, bank_codes)
+
+        # Reuse accounts already fetched during this request
+        request_cache = _request_accounts_cache.get()
+        cache_key = (client_id, tuple(sorted(bank_codes)))
+        if request_cache is not None and cache_key in request_cache:
+            return list(request_cache[cache_key])
+
+        # Index linked accounts by bank once instead of re-filtering per bank
+        linked_by_bank = AggregationService._linked_accounts_by_bank(client_id)
+
+        # Banks are independent, so query them concurrently (results keep bank order)
+        bank_results = await asyncio.gather(
+            *(
+                AggregationService._fetch_accounts_for_bank(
+                    bank_code, client_id, linked_by_bank.get(bank_code, [])
+                )
+                for bank_code in bank_codes
+            )
+        )
+        all_accounts: list[Account] = [
+            account for accounts in bank_results for account in accounts
+        ]
+
+        # If no real accounts but have linked accounts, generate demo accounts
+        if len(all_accounts) == 0:
+            all_accounts = AggregationService._demo_accounts(linked_by_bank, bank_codes)
+
+        if request_cache is not None:
+            request_cache[cache_key] = list(all_accounts)
+
+        return all_accounts
+
+    @staticmethod
+    async def get_accounts_stream(
+        client_id: str, bank_codes: Optional[list[str]] = None
+    ) -> AsyncIterator[Account]:
+        """Stream accounts from all banks as each bank responds.
+
+        Unlike get_accounts, a slow bank does not hold back accounts from
+        faster ones: time to first account is the fastest bank's latency.
+
+        Args:
+            client_id: Client ID
+            bank_codes: List of bank codes to query (None = all banks or linked banks)
+
+        Yields:
+            Normalized accounts (demo accounts if no bank returned any)
+        """
+        bank_codes = AggregationService._resolve_bank_codes(client_id, bank_codes)
+        linked_by_bank = AggregationService._linked_accounts_by_bank(client_id)
+
+        tasks = [
+            asyncio.create_task(
+                AggregationService._fetch_accounts_for_bank(
+                    bank_code, client_id, linked_by_bank.get(bank_code, [])
+                )
+            )
+            for bank_code in bank_codes
+        ]
+        has_accounts = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for account in await next_done:
+                    has_accounts = True
+                    yield account
+        finally:
+            # Stop outstanding bank requests if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+
+        if not has_accounts:
+            for account in AggregationService._demo_accounts(linked_by_bank, bank_codes):
+                yield account
+
+    @staticmethod
+    async def _fetch_balances_batch(
+        client: Any,
+        bank_code: str,
+        bank_token: str,
+        acc_ids: list[str],
+        client_id: str,
+        consent_id: Optional[str],
+    ) -> Optional[list[Balance]]:
+        """Fetch balances for all accounts of a bank with a single batch request.
+
+        Args:
+            client: Bank client
+            bank_code: Bank code
+            bank_token: Bank token
+            acc_ids: Account IDs at this bank
+            client_id: Client ID
+            consent_id: Consent ID (if available)
+
+        Returns:
+            List of normalized balances, or None if the caller should fall
+            back to per-account requests
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        if (
+            not settings.batch_balances_enabled
+            or len(acc_ids) < 2
+            or bank_code in _BATCH_BALANCES_UNSUPPORTED
+        ):
+            return None
+
+        # The endpoint is not part of any bank spec: no rate-limit retries, and a
+        # missing endpoint or unexpected shape turns batching off for the bank.
+        # Other failures (timeouts, 429, 5xx, consent) only affect this call
+        balances_by_account = None
+        try:
+            async with _bank_semaphore(bank_code):
+                balances_response = await cached(
+                    ("balances_batch", bank_code, client_id, tuple(acc_ids)),
+                    BALANCES_TTL,
+                    lambda: client.get_balances_batch(
+                        bank_token=bank_token,
+                        account_ids=acc_ids,
+                        client_id=client_id,
+                        requesting_bank=settings.requesting_bank_id,
+                        consent_id=consent_id,
+                    ),
+                    timeout=10.0,
+                )
+            # Expected format: {"data": {"balances": {account_id: [...]}}} or {"balances": {account_id: [...]}}
+            if isinstance(balances_response, dict):
+                data_section = balances_response.get("data", balances_response)
+                if isinstance(data_section, dict):
+                    balances_by_account = data_section.get("balances")
+        except BankAPIError as e:
+            if e.status_code in (404, 405, 501):
+                _BATCH_BALANCES_UNSUPPORTED.add(bank_code)
+                logger.info(f"Batch balances not supported by {bank_code}, using per-account requests")
+            else:
+                logger.warning(f"Batch balances request to {bank_code} failed: {e.detail}")
+            return None
+        except Exception as e:
+            logger.warning(f"Batch balances request to {bank_code} failed: {type(e).__name__}: {e}")
+            return None
+
+        if not isinstance(balances_by_account, dict):
+            _BATCH_BALANCES_UNSUPPORTED.add(bank_code)
+            logger.info(f"Batch balances not supported by {bank_code}, using per-account requests")
+            return None
+
+        balances: list[Balance] = []
+        for account_id in acc_ids:
+            balances_list = balances_by_account.get(account_id, [])
+            # If balance is a single dict, wrap it in a list
+            if isinstance(balances_list, dict):
+                balances_list = [balances_list]
+            if not isinstance(balances_list, list):
+                continue
+            for balance_data in balances_list:
+                balances.append(AggregationService._normalize_balance(balance_data, account_id))
+
+        logger.info(f"Got {len(balances)} balances for {len(acc_ids)} accounts from {bank_code} in one batch request")
+        return balances
+
+    @staticmethod
+    async def _fetch_balances_for_bank(
+        bank_code: str, acc_ids: list[str], client_id: str
+    ) -> list[Balance]:
+        """Fetch balances for accounts of a single bank.
+
+        Args:
+            bank_code: Bank code
+            acc_ids: Account IDs at this bank
+            client_id: Client ID
+
+        Returns:
+            List of normalized balances (empty if the bank is unavailable)
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        balances: list[Balance] = []
+
+        # Check if credentials are available
+        if not _has_bank_credentials(bank_code):
+            return balances
+            
+        try:
+            # Step 1: Get bank token with timeout protection
+            try:
+                async with asyncio.timeout(5.0):  # 5 second timeout per bank
+                    token_data = await TokenService.get_bank_token(bank_code)
+                bank_token = token_data["access_token"]
+            except asyncio.TimeoutError:
+                # Skip this bank if token request times out
+                return balances
+
+            client = get_bank_client(bank_code)
+            # Step 3: Get balances (interbank request)
+            # GET /accounts/{id}/balances?client_id=team268-1
+            # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268
+            # Note: X-Consent-Id should be included if consent was created
+            # Get consent_id if available (was created when getting accounts)
+            consent_id = ConsentService.get_consent_id(client_id, bank_code)
+            if consent_id:
+                logger.info(f"✅ Found consent_id={consent_id} for {bank_code}, client_id={client_id}")
+            else:
+                logger.warning(f"⚠️ No consent_id found for {bank_code}, client_id={client_id} - will try to create one")
+            logger.info(f"Getting balances from {bank_code} for {len(acc_ids)} accounts, consent_id={'present' if consent_id else 'missing'}")
+            
+            # If no consent_id, try to create consent (should have been created in get_accounts, but just in case)
+            if not consent_id:
+                logger.warning(f"No consent_id found for {bank_code}, attempting to create consent")
+                try:
+                    consent_id, _ = await ConsentService.ensure_consent(
+                        bank_code=bank_code,
+                        client_id=client_id,
+                        permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
+                    )
+                    if consent_id:
+                        logger.info(f"Created consent for {bank_code}, consent_id={consent_id}")
+                except Exception as e:
+                    logger.error(f"Failed to create consent for {bank_code}: {e}")
+            
+            # A consent still missing here is pending (SBank) or failed to create:
+            # don't request it again for every account the bank rejects
+            renew_consent = _consent_renewer(bank_code, client_id) if consent_id else None
+
+            # One batch request per bank if the bank supports it
+            batch_balances = await AggregationService._fetch_balances_batch(
+                client, bank_code, bank_token, acc_ids, client_id, consent_id
+            )
+            if batch_balances is not None:
+                balances.extend(batch_balances)
+                return balances
+
+            # Accounts are independent, so request them concurrently instead of
+            # paying one round trip per account; the per-bank semaphore caps fan-out
+
+            async def fetch_one(account_id: str) -> list[Balance]:
+                nonlocal consent_id
+                account_balances: list[Balance] = []
+                async with _bank_semaphore(bank_code):
+                    try:
+                        logger.info(f"🔍 Requesting balances for account {account_id} from {bank_code} with consent_id={consent_id}")
+                        try:
+                            # Timeout lives inside cached() so a stale response can be served instead
+                            balances_response = await cached(
+                                ("balances", bank_code, client_id, account_id),
+                                BALANCES_TTL,
+                                lambda: _retry_on_rate_limit(
+                                    lambda: client.get_balances(
+                                        bank_token=bank_token,
+                                        account_id=account_id,
+                                        client_id=client_id,
+                                        requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
+                                        consent_id=consent_id,  # Pass consent_id if available
+                                    )
+                                ),
+                                timeout=10.0,  # Увеличено с 5 до 10 секунд
+                            )
+                        except ConsentRequiredError:
+                            # Safety net: consent expired or was revoked on the bank side
+                            logger.warning(f"Consent {consent_id} rejected by {bank_code} for balances of account {account_id}")
+                            if renew_consent is None:
+                                return account_balances
+                            consent_id = await renew_consent()
+                            if not consent_id:
+                                return account_balances
+                            async with asyncio.timeout(10.0):
+                                balances_response = await client.get_balances(
+                                    bank_token=bank_token,
+                                    account_id=account_id,
+                                    client_id=client_id,
+                                    requesting_bank=settings.requesting_bank_id,
+                                    consent_id=consent_id,
+                                )
+
+                        # API may return balances in data.balances or data.balance
+                        # Handle both formats: {"data": {"balances": [...]}} and {"balances": [...]}
+                        data_section = balances_response.get("data", {})
+                        if isinstance(data_section, dict):
+                            balances_list = data_section.get("balances", data_section.get("balance", []))
+                            # If balance is a single dict, wrap it in a list
+                            if isinstance(balances_list, dict):
+                                balances_list = [balances_list]
+                        else:
+                            balances_list = balances_response.get("balances", [])
+                    
+                        # Ensure balances_list is a list
+                        if not isinstance(balances_list, list):
+                            balances_list = []
+                    
+                        logger.info(f"Got {len(balances_list)} balances for account {account_id} from {bank_code} (consent_id={'present' if consent_id else 'missing'})")
+                        if len(balances_list) == 0:
+                            logger.warning(f"No balances returned for account {account_id} from {bank_code} - full response: {balances_response}")
+                        for balance_data in balances_list:
+                            # Log raw balance data for debugging
+                            logger.debug(f"Raw balance_data for {account_id}: {balance_data}")
+                            normalized = AggregationService._normalize_balance(
+                                balance_data, account_id
+                            )
+                            account_balances.append(normalized)
+                            logger.info(f"✅ REAL Balance for {account_id}: amount={normalized.amount}, currency={normalized.currency}, type={normalized.balance_type}")
+                    except asyncio.TimeoutError:
+                        logger.error(f"⏱️ Timeout getting balances for account {account_id} from {bank_code} (timeout=10s)")
+                        pass
+                    except Exception as e:
+                        # Skip this account if request fails
+                        logger.error(f"❌ Error getting balances for account {account_id} from {bank_code}: {type(e).__name__}: {e}", exc_info=True)
+                        pass
+                return account_balances
+
+            results = await asyncio.gather(
+                *(fetch_one(account_id) for account_id in acc_ids),
+                return_exceptions=True,
+            )
+            balances.extend(b for r in results if isinstance(r, list) for b in r)
+        except Exception:
+            # Skip this bank if token retrieval fails
+            pass
+
+        return balances
+
+    @staticmethod
+    def _group_account_ids_by_bank(
+        all_accounts: list[Account],
+        linked_accounts: list[dict],
+        account_ids: Optional[list[str]],
+        purpose: str,
+    ) -> tuple[list[str], dict[str, list[str]]]:
+        """Resolve account IDs to query and group them by bank.
+
+        Linked accounts are queried by their account_id if set, otherwise by
+        account_number. Order is preserved and duplicates are dropped.
+
+        Args:
+            all_accounts: Accounts from API
+            linked_accounts: Manually linked accounts
+            account_ids: Specific account IDs to query (None = all accounts)
+            purpose: What the accounts are queried for (for logging)
+
+        Returns:
+            Tuple of (account IDs to query, bank_code -> account IDs)
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        # Account IDs from API accounts and linked accounts
+        api_account_ids = [acc.account_id for acc in all_accounts]
+        linked_account_ids = [
+            linked_acc.get('account_id') or linked_acc['account_number']
+            for linked_acc in linked_accounts
+        ]
+
+        # Combine API account IDs and linked account IDs
+        if account_ids is None:
+            # Use all available account IDs (from API and linked accounts)
+            # dict.fromkeys de-duplicates while keeping a deterministic order
+            account_ids = list(dict.fromkeys(api_account_ids + linked_account_ids))
+        else:
+            # Filter to only requested account_ids
+            known_ids = set(api_account_ids).union(linked_account_ids)
+            account_ids = [acc_id for acc_id in account_ids if acc_id in known_ids]
+        wanted_ids = set(account_ids)
+
+        # Group accounts by bank; dict keys act as an ordered set per bank
+        accounts_by_bank: defaultdict[str, dict[str, None]] = defaultdict(dict)
+        # First, use accounts from API
+        for account in all_accounts:
+            if account.account_id in wanted_ids:
+                accounts_by_bank[account.bank][account.account_id] = None
 
-        # Group accounts by bank
-        # First, use accounts from API
-        accounts_by_bank: dict[str, list[str]] = {}
-        for account in all_accounts:
-            if account.account_id in account_ids:
-                if account.bank not in accounts_by_bank:
-                    accounts_by_bank[account.bank] = []
-                accounts_by_bank[account.bank].append(account.account_id)
-        
         # Also add linked accounts - use their bank and account_number/account_id
         for linked_acc in linked_accounts:
             bank_code = linked_acc['bank']
             acc_id = linked_acc.get('account_id') or linked_acc['account_number']
-            if acc_id in account_ids:
-                if bank_code not in accounts_by_bank:
-                    accounts_by_bank[bank_code] = []
-                if acc_id not in accounts_by_bank[bank_code]:
-                    accounts_by_bank[bank_code].append(acc_id)
-                    logger_txn.info(f"Added linked account {acc_id} from {bank_code} to transactions query")
+            if acc_id in wanted_ids and acc_id not in accounts_by_bank[bank_code]:
+                accounts_by_bank[bank_code][acc_id] = None
+                logger.info(f"Added linked account {acc_id} from {bank_code} to {purpose} query")
 
-        # Get transactions for each bank
-        for bank_code, acc_ids in accounts_by_bank.items():
-            # Check if credentials are available
-            if not _has_bank_credentials(bank_code):
+        return account_ids, {bank_code: list(ids) for bank_code, ids in accounts_by_bank.items()}
+
+    @staticmethod
+    async def _plan_queries(
+        client_id: str,
+        account_ids: Optional[list[str]],
+        bank_codes: Optional[list[str]],
+        accounts: Optional[list[Account]],
+        purpose: str,
+    ) -> tuple[list[Account], list[dict], list[str], dict[str, list[str]]]:
+        """Collect accounts to query for balances or transactions.
+
+        Args:
+            client_id: Client ID
+            account_ids: Specific account IDs to query (None = all accounts)
+            bank_codes: List of bank codes to query (None = all banks)
+            accounts: Already fetched accounts (None = fetch them via get_accounts)
+            purpose: What the accounts are queried for (for logging)
+
+        Returns:
+            Tuple of (API accounts, linked accounts, account IDs to query, bank_code -> account IDs)
+        """
+        # Get accounts from API (unless the caller already has them)
+        if accounts is None:
+            accounts = await AggregationService.get_accounts(client_id, bank_codes)
+        all_accounts = accounts
+        
+        # Also get linked accounts - they may have account_number that we can use directly
+        import logging
+        logger = logging.getLogger(__name__)
+        linked_accounts = AccountLinkingService.get_linked_accounts(client_id)
+        logger.info(f"Got {len(all_accounts)} accounts from API and {len(linked_accounts)} linked accounts for {purpose}")
+        
+        # Resolve account IDs to query and group them by bank
+        account_ids, accounts_by_bank = AggregationService._group_account_ids_by_bank(
+            all_accounts, linked_accounts, account_ids, purpose
+        )
+        return all_accounts, linked_accounts, account_ids, accounts_by_bank
+
+    @staticmethod
+    async def _iter_bank_results(
+        tasks: list["asyncio.Task[list[Any]]"], purpose: str
+    ) -> AsyncIterator[Any]:
+        """Yield items from per-bank tasks in the order the banks respond.
+
+        Args:
+            tasks: Per-bank tasks, each returning a list of items
+            purpose: What is being fetched (for logging)
+
+        Yields:
+            Items from every bank that succeeded
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    items = await next_done
+                except Exception as e:
+                    logger.error(f"Error getting {purpose}: {e}")
+                    continue
+                for item in items:
+                    yield item
+        finally:
+            # Stop outstanding bank requests if the consumer goes away early
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _demo_balances(
+        all_accounts: list[Account], linked_accounts: list[dict], account_ids: list[str]
+    ) -> list[Balance]:
+        """Build demo balances when no bank returned any.
+
+        Args:
+            all_accounts: Accounts from API
+            linked_accounts: Manually linked accounts
+            account_ids: Account IDs that were queried
+
+        Returns:
+            List of demo balances (empty if real accounts exist)
+        """
+        import logging
+        logger_bal = logging.getLogger(__name__)
+
+        demo_balances: list[Balance] = []
+
+        # IMPORTANT: Only generate demo balances if:
+        # 1. We got NO balances from API (caller checks this)
+        # 2. AND we have NO real accounts from API (API returned 0 accounts)
+        # 3. AND we have linked accounts (user manually linked accounts)
+        # In this case, we generate demo data because we can't get real data from API
+        # Check if we got real accounts from API
+        has_real_accounts_from_api = len(all_accounts) > 0
+        
+        if not has_real_accounts_from_api and len(linked_accounts) > 0:
+            # No real accounts from API but have linked accounts - generate demo data
+            logger_bal.info(f"No real accounts from API, but have {len(linked_accounts)} linked accounts - generating demo balances")
+            for acc in linked_accounts:
+                # Only generate demo for accounts that were requested
+                if account_ids is None or acc['account_number'] in account_ids or (acc.get('account_id') and acc['account_id'] in account_ids):
+                    demo_balance = Balance(
+                        account_id=acc.get('account_id') or acc['account_number'],
+                        amount="50000.00",
+                        currency="RUB",
+                        balance_type="interimBooked"
+                    )
+                    demo_balances.append(demo_balance)
+        elif has_real_accounts_from_api:
+            # We have real accounts but no balances - this indicates an error getting balances
+            logger_bal.warning(f"Have {len(all_accounts)} real accounts from API but got 0 balances - this indicates an error getting balances, NOT generating demo data")
+        else:
+            # No accounts, no linked accounts - nothing to show
+            logger_bal.info(f"No accounts from API and no linked accounts - returning empty balances")
+
+        return demo_balances
+
+    @staticmethod
+    async def get_balances(
+        client_id: str,
+        account_ids: Optional[list[str]] = None,
+        bank_codes: Optional[list[str]] = None,
+        accounts: Optional[list[Account]] = None,
+    ) -> list[Balance]:
+        """Aggregate balances for accounts.
+
+        Args:
+            client_id: Client ID
+            account_ids: Specific account IDs to query (None = all accounts)
+            bank_codes: List of bank codes to query (None = all banks)
+            accounts: Already fetched accounts (None = fetch them via get_accounts)
+
+        Returns:
+            List of normalized balances
+        """
+        import logging
+        logger_bal = logging.getLogger(__name__)
+
+        all_accounts, linked_accounts, account_ids, accounts_by_bank = await AggregationService._plan_queries(
+            client_id, account_ids, bank_codes, accounts, "balances"
+        )
+
+        all_balances: list[Balance] = []
+
+        # Get balances for each bank
+        # Note: We assume consent was already created in get_accounts step
+        # If consent is missing, we'll get 403 and skip this account
+        # Banks are independent, so query them concurrently: latency is max over banks, not sum
+        bank_results = await asyncio.gather(
+            *(
+                AggregationService._fetch_balances_for_bank(bank_code, acc_ids, client_id)
+                for bank_code, acc_ids in accounts_by_bank.items()
+            ),
+            return_exceptions=True,
+        )
+        for bank_code, result in zip(accounts_by_bank, bank_results):
+            if isinstance(result, BaseException):
+                logger_bal.error(f"Error getting balances from {bank_code}: {result}")
                 continue
-                
+            all_balances.extend(result)
+
+        if len(all_balances) == 0:
+            all_balances = AggregationService._demo_balances(all_accounts, linked_accounts, account_ids)
+
+        return all_balances
+
+    @staticmethod
+    async def _fetch_transactions_for_bank(
+        bank_code: str,
+        acc_ids: list[str],
+        client_id: str,
+        from_date: datetime,
+        to_date: datetime,
+    ) -> tuple[list[Transaction], bool]:
+        """Fetch transactions for accounts of a single bank.
+
+        Args:
+            bank_code: Bank code
+            acc_ids: Account IDs at this bank
+            client_id: Client ID
+            from_date: Start date
+            to_date: End date
+
+        Returns:
+            List of normalized transactions (empty if the bank is unavailable),
+            and whether the bank answered for every account
+        """
+        import logging
+        logger_txn = logging.getLogger(__name__)
+
+        transactions: list[Transaction] = []
+        complete = False
+
+        # Check if credentials are available
+        if not _has_bank_credentials(bank_code):
+            # Nothing to wait for: the bank is never queried
+            return transactions, True
+            
+        try:
+            # Step 1: Get bank token with timeout protection
             try:
-                # Step 1: Get bank token with timeout protection
+                async with asyncio.timeout(5.0):  # 5 second timeout per bank
+                    token_data = await TokenService.get_bank_token(bank_code)
+                bank_token = token_data["access_token"]
+            except asyncio.TimeoutError:
+                # Skip this bank if token request times out
+                return transactions, complete
+
+            client = get_bank_client(bank_code)
+            # Step 3: Get transactions (interbank request)
+            # GET /accounts/{id}/transactions?client_id=team268-1&from_booking_date_time=...&to_booking_date_time=...
+            # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268, X-Consent-Id: <consent_id>
+            # Note: Consent should be created in get_accounts step above
+            # Get consent_id if available (was created when getting accounts)
+            consent_id = ConsentService.get_consent_id(client_id, bank_code)
+            logger_txn.info(f"Getting transactions from {bank_code} for {len(acc_ids)} accounts, consent_id={'present' if consent_id else 'missing'}, from_date={from_date.isoformat()}, to_date={to_date.isoformat()}")
+            
+            # If no consent_id, create it once up front instead of waiting for a 403 on every account
+            if not consent_id:
                 try:
-                    token_data = await asyncio.wait_for(
-                        TokenService.get_bank_token(bank_code),
-                        timeout=5.0  # 5 second timeout per bank
+                    consent_id, _ = await ConsentService.ensure_consent(
+                        bank_code=bank_code,
+                        client_id=client_id,
+                        permissions=["ReadAccountsDetail", "ReadBalances", "ReadTransactions"],
                     )
-                    bank_token = token_data["access_token"]
-                except asyncio.TimeoutError:
-                    # Skip this bank if token request times out
-                    continue
+                    if consent_id:
+                        logger_txn.info(f"Created consent for {bank_code}, consent_id={consent_id}")
+                except Exception as e:
+                    logger_txn.error(f"Failed to create consent for {bank_code}: {e}")
 
-                client = get_bank_client(bank_code)
-                try:
-                    # Step 3: Get transactions (interbank request)
-                    # GET /accounts/{id}/transactions?client_id=team268-1&from_booking_date_time=...&to_booking_date_time=...
-                    # Headers: Authorization: Bearer <bank_token>, X-Requesting-Bank: team268, X-Consent-Id: <consent_id>
-                    # Note: Consent should be created in get_accounts step above
-                    # Get consent_id if available (was created when getting accounts)
-                    consent_id = ConsentService.get_consent_id(client_id, bank_code)
-                    logger_txn.info(f"Getting transactions from {bank_code} for {len(acc_ids)} accounts, consent_id={'present' if consent_id else 'missing'}, from_date={from_date.isoformat()}, to_date={to_date.isoformat()}")
-                    
-                    for account_id in acc_ids:
+            # A consent still missing here is pending (SBank) or failed to create:
+            # don't request it again for every account the bank rejects
+            renew_consent = _consent_renewer(bank_code, client_id) if consent_id else None
+
+            # Accounts are independent, so request them concurrently instead of
+            # paying one round trip per account; the per-bank semaphore caps fan-out
+
+            complete = True
+
+            async def fetch_one(account_id: str) -> list[Transaction]:
+                nonlocal consent_id, complete
+                account_transactions: list[Transaction] = []
+                async with _bank_semaphore(bank_code):
+                    try:
                         try:
+                            # Period bounds are keyed at minute precision: to_date defaults to now()
+                            transactions_response = await cached(
+                                (
+                                    "transactions", bank_code, client_id, account_id,
+                                    from_date.isoformat(timespec="minutes"),
+                                    to_date.isoformat(timespec="minutes"),
+                                ),
+                                TRANSACTIONS_TTL,
+                                lambda: _retry_on_rate_limit(
+                                    lambda: client.get_transactions(
+                                        bank_token=bank_token,
+                                        account_id=account_id,
+                                        client_id=client_id,
+                                        requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
+                                        from_booking_date_time=from_date.isoformat(),
+                                        to_booking_date_time=to_date.isoformat(),
+                                        consent_id=consent_id,  # Pass consent_id if available
+                                    )
+                                ),
+                            )
+                        except ConsentRequiredError:
+                            # Safety net: consent expired or was revoked on the bank side
+                            logger_txn.warning(f"Consent {consent_id} rejected by {bank_code} for transactions of account {account_id}")
+                            if renew_consent is not None:
+                                consent_id = await renew_consent()
+                            if renew_consent is None or not consent_id:
+                                complete = False
+                                return account_transactions
                             transactions_response = await client.get_transactions(
                                 bank_token=bank_token,
                                 account_id=account_id,
                                 client_id=client_id,
-                                requesting_bank=settings.requesting_bank_id,  # team268 (without suffix)
+                                requesting_bank=settings.requesting_bank_id,
                                 from_booking_date_time=from_date.isoformat(),
                                 to_booking_date_time=to_date.isoformat(),
-                                consent_id=consent_id,  # Pass consent_id if available
+                                consent_id=consent_id,
                             )
 
-                            # API may return transactions in data.transactions or data.transaction
-                            # Handle both formats: {"data": {"transactions": [...]}} and {"transactions": [...]}
-                            data_section = transactions_response.get("data", {})
-                            if isinstance(data_section, dict):
-                                transactions_list = data_section.get("transactions", data_section.get("transaction", []))
-                                # If transaction is a single dict, wrap it in a list
-                                if isinstance(transactions_list, dict):
-                                    transactions_list = [transactions_list]
-                            else:
-                                transactions_list = transactions_response.get("transactions", [])
-                            
-                            # Ensure transactions_list is a list
-                            if not isinstance(transactions_list, list):
-                                transactions_list = []
-                            
-                            logger_txn.info(f"Got {len(transactions_list)} transactions for account {account_id} from {bank_code}")
-                            for transaction_data in transactions_list:
-                                normalized = (
-                                    AggregationService._normalize_transaction(
-                                        transaction_data, account_id
-                                    )
+                        # API may return transactions in data.transactions or data.transaction
+                        # Handle both formats: {"data": {"transactions": [...]}} and {"transactions": [...]}
+                        data_section = transactions_response.get("data", {})
+                        if isinstance(data_section, dict):
+                            transactions_list = data_section.get("transactions", data_section.get("transaction", []))
+                            # If transaction is a single dict, wrap it in a list
+                            if isinstance(transactions_list, dict):
+                                transactions_list = [transactions_list]
+                        else:
+                            transactions_list = transactions_response.get("transactions", [])
+                    
+                        # Ensure transactions_list is a list
+                        if not isinstance(transactions_list, list):
+                            transactions_list = []
+                    
+                        logger_txn.info(f"Got {len(transactions_list)} transactions for account {account_id} from {bank_code}")
+                        for transaction_data in transactions_list:
+                            normalized = (
+                                AggregationService._normalize_transaction(
+                                    transaction_data, account_id
                                 )
-                                all_transactions.append(normalized)
-                        except ConsentRequiredError as e:
-                            # Consent required for transactions - try to create consent if not already created
-                            logger_txn.warning(f"Consent required for transactions from {bank_code}, account {account_id} (current consent_id: {consent_id})")
-                            if not consent_id:
-                                try:
-                                    # Create consent with ReadTransactions permission
-                                    consent_response = await ConsentService.request_accounts_consent(
-                                        bank_code=bank_code,
-                                        client_id=client_id,
-                                        permissions=["ReadTransactions"],
-                                    )
-                                    consent_id = consent_response.get("consent_id")
-                                    if consent_id:
-                                        # Retry with new consent_id
-                                        logger_txn.info(f"Created new consent for transactions: {consent_id}, retrying...")
-                                        try:
-                                            transactions_response = await client.get_transactions(
-                                                bank_token=bank_token,
-                                                account_id=account_id,
-                                                client_id=client_id,
-                                                requesting_bank=settings.requesting_bank_id,
-                                                from_booking_date_time=from_date.isoformat(),
-                                                to_booking_date_time=to_date.isoformat(),
-                                                consent_id=consent_id,
-                                            )
-                                            # Parse transactions response
-                                            data_section = transactions_response.get("data", {})
-                                            if isinstance(data_section, dict):
-                                                transactions_list = data_section.get("transactions", data_section.get("transaction", []))
-                                                if isinstance(transactions_list, dict):
-                                                    transactions_list = [transactions_list]
-                                            else:
-                                                transactions_list = transactions_response.get("transactions", [])
-                                            
-                                            if not isinstance(transactions_list, list):
-                                                transactions_list = []
-                                            
-                                            for transaction_data in transactions_list:
-                                                normalized = AggregationService._normalize_transaction(
-                                                    transaction_data, account_id
-                                                )
-                                                all_transactions.append(normalized)
-                                                logger_txn.info(f"✅ REAL Transaction for {account_id}: {normalized.amount} {normalized.currency}")
-                                        except Exception as e2:
-                                            logger_txn.error(f"Error retrying transactions with new consent: {e2}")
-                                except Exception as e2:
-                                    logger_txn.error(f"Failed to create consent for transactions: {e2}")
-                        except Exception as e:
-                            # Skip this account if request fails
-                            logger_txn.error(f"Error getting transactions for account {account_id} from {bank_code}: {e}", exc_info=True)
-                            pass
-                finally:
-                    await client.close()
-            except Exception:
-                # Skip this bank if token retrieval fails
-                pass
+                            )
+                            account_transactions.append(normalized)
+                    except Exception as e:
+                        # Skip this account if request fails
+                        complete = False
+                        logger_txn.error(f"Error getting transactions for account {account_id} from {bank_code}: {e}", exc_info=True)
+                return account_transactions
+
+            results = await asyncio.gather(
+                *(fetch_one(account_id) for account_id in acc_ids),
+                return_exceptions=True,
+            )
+            transactions.extend(t for r in results if isinstance(r, list) for t in r)
+            complete = complete and all(isinstance(r, list) for r in results)
+        except Exception:
+            # Skip this bank if token retrieval fails
+            complete = False
+
+        return transactions, complete
+
+    @staticmethod
+    async def get_transactions(
+        client_id: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        account_ids: Optional[list[str]] = None,
+        bank_codes: Optional[list[str]] = None,
+        accounts: Optional[list[Account]] = None,
+    ) -> list[Transaction]:
+        """Aggregate transactions from all accounts.
+
+        Args:
+            client_id: Client ID
+            from_date: Start date (default: 30 days ago)
+            to_date: End date (default: now)
+            account_ids: Specific account IDs to query (None = all accounts)
+            bank_codes: List of bank codes to query (None = all banks)
+            accounts: Already fetched accounts (None = fetch them via get_accounts)
+
+        Returns:
+            List of normalized transactions
+        """
+        transactions, _ = await AggregationService.get_transactions_with_status(
+            client_id, from_date, to_date, account_ids, bank_codes, accounts
+        )
+        return transactions
+
+    @staticmethod
+    async def get_transactions_with_status(
+        client_id: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        account_ids: Optional[list[str]] = None,
+        bank_codes: Optional[list[str]] = None,
+        accounts: Optional[list[Account]] = None,
+    ) -> tuple[list[Transaction], bool]:
+        """Aggregate transactions from all accounts and report whether every bank answered.
+
+        Args:
+            client_id: Client ID
+            from_date: Start date (default: 30 days ago)
+            to_date: End date (default: now)
+            account_ids: Specific account IDs to query (None = all accounts)
+            bank_codes: List of bank codes to query (None = all banks)
+            accounts: Already fetched accounts (None = fetch them via get_accounts)
+
+        Returns:
+            List of normalized transactions, and False if any bank or account
+            failed so the list is partial
+        """
+        if from_date is None:
+            from_date = datetime.now() - timedelta(days=30)
+        if to_date is None:
+            to_date = datetime.now()
+
+        import logging
+        logger_txn = logging.getLogger(__name__)
+
+        _, _, account_ids, accounts_by_bank = await AggregationService._plan_queries(
+            client_id, account_ids, bank_codes, accounts, "transactions"
+        )
+
+        all_transactions: list[Transaction] = []
+        complete = True
+
+        # Get transactions for each bank
+        # Banks are independent, so query them concurrently: latency is max over banks, not sum
+        bank_results = await asyncio.gather(
+            *(
+                AggregationService._fetch_transactions_for_bank(
+                    bank_code, acc_ids, client_id, from_date, to_date
+                )
+                for bank_code, acc_ids in accounts_by_bank.items()
+            ),
+            return_exceptions=True,
+        )
+        for bank_code, result in zip(accounts_by_bank, bank_results):
+            if isinstance(result, BaseException):
+                logger_txn.error(f"Error getting transactions from {bank_code}: {result}")
+                complete = False
+                continue
+            bank_transactions, bank_complete = result
+            all_transactions.extend(bank_transactions)
+            complete = complete and bank_complete
+
+        return all_transactions, complete
+
+    @staticmethod
+    async def get_transactions_stream(
+        client_id: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        account_ids: Optional[list[str]] = None,
+        bank_codes: Optional[list[str]] = None,
+        accounts: Optional[list[Account]] = None,
+    ) -> AsyncIterator[Transaction]:
+        """Stream transactions as each bank responds.
+
+        Same data as get_transactions, but a slow bank does not hold back
+        transactions from faster ones.
+
+        Args:
+            client_id: Client ID
+            from_date: Start date (default: 30 days ago)
+            to_date: End date (default: now)
+            account_ids: Specific account IDs to query (None = all accounts)
+            bank_codes: List of bank codes to query (None = all banks)
+            accounts: Already fetched accounts (None = fetch them via get_accounts)
+
+        Yields:
+            Normalized transactions
+        """
+        if from_date is None:
+            from_date = datetime.now() - timedelta(days=30)
+        if to_date is None:
+            to_date = datetime.now()
+
+        _, _, account_ids, accounts_by_bank = await AggregationService._plan_queries(
+            client_id, account_ids, bank_codes, accounts, "transactions"
+        )
+
+        async def fetch_bank(bank_code: str, acc_ids: list[str]) -> list[Transaction]:
+            transactions, _ = await AggregationService._fetch_transactions_for_bank(
+                bank_code, acc_ids, client_id, from_date, to_date
+            )
+            return transactions
 
-        return all_transactions
+        tasks = [
+            asyncio.create_task(fetch_bank(bank_code, acc_ids))
+            for bank_code, acc_ids in accounts_by_bank.items()
+        ]
+        async for transaction in AggregationService._iter_bank_results(tasks, "transactions"):
+            yield transaction
@@ -1,20 +1,209 @@
 """Analytics service for financial data analysis."""
 import asyncio
-from datetime import datetime, timedelta
-from typing import Any
+import heapq
+import math
+import operator
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Awaitable, Optional
 from collections import defaultdict
-from app.services.aggregation import AggregationService
+from app.core.cache import TTLCache, single_flight
+from app.core.types import Account
+from app.services.aggregation import _BANK_CODES, AggregationService, _has_bank_credentials
+
+# First number in amounts that arrive as a dict/repr string, e.g. "{'amount': '100.50'}"
+_AMOUNT_IN_TEXT_RE = re.compile(r"-?\d+\.?\d*")
+# Everything except digits, decimal point and minus sign
+_NON_NUMERIC_RE = re.compile(r"[^\d.\-]")
+
+
+def _parse_amount(raw: Any) -> Optional[float]:
+    """Parse a balance amount as float.
+
+    Well-formed amounts take the plain float() path; malformed ones are
+    sanitized (number extracted from dict-like strings, stray characters
+    such as currency signs or spaces dropped).
+
+    Args:
+        raw: Amount as returned by the bank (usually a string)
+
+    Returns:
+        Parsed amount, or None if no number can be extracted
+    """
+    amount_str = str(raw).strip()
+    try:
+        amount = float(amount_str)
+        if math.isfinite(amount):
+            return amount
+    except ValueError:
+        pass
+
+    if amount_str.startswith("{") or amount_str.startswith("'"):
+        # If amount is a string representation of a dict, take the first number in it
+        match = _AMOUNT_IN_TEXT_RE.search(amount_str)
+        amount_str = match.group() if match else ""
+    else:
+        amount_str = _NON_NUMERIC_RE.sub("", amount_str)
+
+    if not amount_str or amount_str in (".", "-"):
+        return None
+    try:
+        return float(amount_str)
+    except ValueError:
+        return None
+
+
+# MCC ranges (inclusive) per category
+_MCC_RANGES: list[tuple[int, int, str]] = [
+    (5411, 5412, "groceries"),  # Grocery stores
+    (5812, 5814, "restaurants"),  # Restaurants
+    (5541, 5542, "gas"),  # Gas stations
+    (5912, 5912, "pharmacy"),  # Pharmacies
+    (5311, 5311, "shopping"),  # Department stores
+]
+
+# Flat MCC -> category map expanded once from the ranges above
+_MCC_CATEGORIES: dict[int, str] = {
+    code: category
+    for lo, hi, category in _MCC_RANGES
+    for code in range(lo, hi + 1)
+}
+
+# Description keywords per category, in priority order
+_CATEGORY_KEYWORDS: list[tuple[str, list[str]]] = [
+    ("groceries", ["магазин", "store", "супермаркет"]),
+    ("restaurants", ["ресторан", "кафе", "restaurant", "cafe"]),
+    ("gas", ["заправка", "gas", "бензин"]),
+    ("pharmacy", ["аптека", "pharmacy"]),
+    ("transport", ["транспорт", "transport", "метро", "metro"]),
+    ("entertainment", ["развлечения", "entertainment", "кино", "cinema"]),
+]
+
+# One pattern for all keywords. Each alternative scans the whole description
+# for its category, so the first category in priority order wins (not the
+# leftmost keyword in the text); lastgroup names the matched category.
+_CATEGORY_RE = re.compile(
+    r"\A(?:"
+    + "|".join(
+        rf".*?(?P<{category}>{'|'.join(map(re.escape, words))})"
+        for category, words in _CATEGORY_KEYWORDS
+    )
+    + ")",
+    re.DOTALL,
+)
+
+
+# Balance type preference when an account reports several balances (lower wins)
+_BALANCE_TYPE_PRIORITY: dict[str, int] = {"interimBooked": 0, "openingBooked": 1}
+_DEFAULT_BALANCE_PRIORITY = 2
+
+
+@lru_cache(maxsize=4096)
+def _description_category(description: str) -> Optional[str]:
+    """Match description against category keywords.
+
+    Cached because the same merchant descriptions recur across summaries.
+
+    Args:
+        description: Transaction description
+
+    Returns:
+        Category name, or None if no keyword matches
+    """
+    match = _CATEGORY_RE.match(description.lower())
+    return match.lastgroup if match else None
+
+
+@lru_cache(maxsize=1024)
+def _week_start(day: str) -> Optional[int]:
+    """Get the Monday of the week containing a date.
+
+    Cached because many transactions share a booking day, so each day is
+    parsed once instead of parsing every full booking timestamp.
+
+    Args:
+        day: Date as "YYYY-MM-DD"
+
+    Returns:
+        Day ordinal of the week's Monday, or None if day is not a valid date
+    """
+    try:
+        booking_day = date.fromisoformat(day)
+    except ValueError:
+        return None
+    return booking_day.toordinal() - booking_day.weekday()
+
+
+async def _before(deadline: float, aw: Awaitable[Any]) -> Any:
+    """Await aw, raising TimeoutError once the event loop time reaches deadline."""
+    async with asyncio.timeout_at(deadline):
+        return await aw
 
 
 class AnalyticsService:
     """Service for financial analytics."""
 
+    # In-memory storage (in production, use Redis)
+    # Whole summaries (client_id, period_days) -> summary, reused by dashboards polling every few seconds
+    _summaries: TTLCache = TTLCache(maxsize=1_000, ttl=30)
+    # Transactions (client_id, period_days) -> transactions; the heaviest fetch, reused on summary misses
+    _transactions: TTLCache = TTLCache(maxsize=1_000, ttl=300)
+
+    # Summary builds in flight (client_id, period_days) -> task, so concurrent
+    # dashboard requests share one build; finished builds remove themselves
+    _summary_inflight: dict[tuple[str, int], asyncio.Task] = {}
+
     @staticmethod
     async def get_summary(
         client_id: str, period_days: int = 30
     ) -> dict[str, Any]:
         """Get financial summary for dashboard.
 
+        Args:
+            client_id: Client ID
+            period_days: Number of days to analyze
+
+        Returns:
+            Summary with net worth, spending by category, top expenses, etc.
+        """
+        summary_key = (client_id, period_days)
+        cached_summary = AnalyticsService._summaries.get(summary_key)
+        if cached_summary is not None:
+            return dict(cached_summary)
+
+        summary = await single_flight(
+            AnalyticsService._summary_inflight,
+            summary_key,
+            lambda: AnalyticsService._build_and_cache_summary(client_id, period_days),
+        )
+        return dict(summary)
+
+    @staticmethod
+    async def _build_and_cache_summary(client_id: str, period_days: int) -> dict[str, Any]:
+        """Build summary and store it in the summary cache."""
+        summary = await AnalyticsService._build_summary(client_id, period_days)
+        AnalyticsService._summaries.set((client_id, period_days), summary)
+        return summary
+
+    @staticmethod
+    def invalidate(client_id: str) -> None:
+        """Drop cached summaries and transactions of a client.
+
+        Called when the client's set of accounts changes.
+
+        Args:
+            client_id: Client ID
+        """
+        for cache in (AnalyticsService._summaries, AnalyticsService._transactions):
+            for key in cache.keys():
+                if key[0] == client_id:
+                    cache.pop(key)
+
+    @staticmethod
+    async def _build_summary(client_id: str, period_days: int) -> dict[str, Any]:
+        """Build financial summary from bank data.
+
         Args:
             client_id: Client ID
             period_days: Number of days to analyze
@@ -25,83 +214,60 @@ class AnalyticsService:
         # Get accounts and balances with timeout protection
         import logging
         logger = logging.getLogger(__name__)
-        
+
+        # One 10 second budget for all bank calls of the summary, not 10 seconds per stage
+        deadline = asyncio.get_running_loop().time() + 10.0
+
         try:
-            # IMPORTANT: Get accounts FIRST, then balances
-            # This ensures consent_id is saved before we try to get balances
-            # Use asyncio.wait_for to prevent hanging if banks are slow
-            accounts = await asyncio.wait_for(
-                AggregationService.get_accounts(client_id),
-                timeout=10.0  # 10 second timeout for getting accounts
-            )
-            
-            # Now get balances - consent_id should be available from get_accounts step
-            balances = await asyncio.wait_for(
-                AggregationService.get_balances(client_id),
-                timeout=10.0  # 10 second timeout for getting balances
-            )
-            # Handle exceptions
-            if isinstance(accounts, Exception):
-                logger.warning(f"Error getting accounts: {accounts}")
-                accounts = []
-            if isinstance(balances, Exception):
-                logger.warning(f"Error getting balances: {balances}")
-                balances = []
-            
-            # Log what we got
-            logger.info(f"Got {len(accounts)} accounts, {len(balances)} balances for client {client_id}")
+            # IMPORTANT: Get accounts FIRST, then balances and transactions
+            # get_accounts creates and stores the consent that balances/transactions use
+            # Use asyncio.timeout_at to prevent hanging if banks are slow
+            async with asyncio.timeout_at(deadline):
+                accounts = await AggregationService.get_accounts(client_id)
         except asyncio.TimeoutError:
-            # If timeout, use empty lists - will fall back to demo data if linked accounts exist
-            logger.warning(f"Timeout getting accounts/balances for client {client_id}")
+            # If timeout, use empty list - will fall back to demo data if linked accounts exist
+            logger.warning("Timeout getting accounts for client %s", client_id)
             accounts = []
+
+        # Balances and transactions only depend on accounts, so fetch them concurrently
+        # within the remaining budget and hand over the accounts we already have
+        balances, transactions = await asyncio.gather(
+            _before(deadline, AggregationService.get_balances(client_id, accounts=accounts)),
+            _before(deadline, AnalyticsService._get_transactions(client_id, period_days, accounts)),
+            return_exceptions=True,
+        )
+        # Handle exceptions (timeouts included) - will fall back to demo data if linked accounts exist
+        if isinstance(balances, Exception):
+            logger.warning("Error getting balances for client %s: %r", client_id, balances)
             balances = []
+        if isinstance(transactions, Exception):
+            logger.warning("Error getting transactions for client %s: %r", client_id, transactions)
+            transactions = []
+
+        # Log what we got
+        logger.info("Got %d accounts, %d balances, %d transactions for client %s", len(accounts), len(balances), len(transactions), client_id)
 
         # Calculate net worth - use only one balance per account (prefer interimBooked)
         # Accounts can have multiple balance types (interimBooked, openingBooked, etc.)
         # We should use only one balance type per account to avoid double-counting
         net_worth = 0.0
-        balances_by_account: dict[str, tuple[float, str]] = {}  # account_id -> (amount, balance_type)
+        balances_by_account: dict[str, tuple[float, int]] = {}  # account_id -> (amount, priority)
         for balance in balances:
-            try:
-                # Ensure amount is a string that can be converted to float
-                amount_str = str(balance.amount).strip()
-                # Remove any non-numeric characters except decimal point and minus sign
-                # But preserve the structure if it's a dict representation
-                if amount_str.startswith('{') or amount_str.startswith("'"):
-                    # If amount is a string representation of a dict, try to extract the numeric value
-                    import re
-                    # Try to find a number in the string
-                    numbers = re.findall(r'-?\d+\.?\d*', amount_str)
-                    if numbers:
-                        amount_str = numbers[0]
-                    else:
-                        logger.warning(f"Could not extract number from amount string: {amount_str}")
-                        continue
-                else:
-                    amount_str = ''.join(c for c in amount_str if c.isdigit() or c in '.-')
-                
-                if amount_str and amount_str != '.' and amount_str != '-':
-                    amount = float(amount_str)
-                    # Use only one balance per account - prefer interimBooked, then openingBooked, then any other
-                    if balance.account_id not in balances_by_account:
-                        balances_by_account[balance.account_id] = (amount, balance.balance_type)
-                    else:
-                        # Prefer interimBooked over other types
-                        current_type = balances_by_account[balance.account_id][1]
-                        if balance.balance_type == "interimBooked" and current_type != "interimBooked":
-                            balances_by_account[balance.account_id] = (amount, balance.balance_type)
-                        elif balance.balance_type == "openingBooked" and current_type not in ["interimBooked", "openingBooked"]:
-                            balances_by_account[balance.account_id] = (amount, balance.balance_type)
-                    logger.debug(f"Balance for {balance.account_id}: {amount} {balance.currency} (type: {balance.balance_type})")
-                else:
-                    logger.warning(f"Invalid amount format for balance {balance.account_id}: '{balance.amount}' (raw: {repr(balance.amount)})")
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Error parsing balance amount for {balance.account_id}: {balance.amount} (type: {type(balance.amount)}, error: {e})")
-                pass
+            amount = _parse_amount(balance.amount)
+            if amount is None:
+                logger.warning("Invalid amount format for balance %s: %r", balance.account_id, balance.amount)
+                continue
+            # Use only one balance per account - prefer interimBooked, then openingBooked, then
+            # the first balance of any other type
+            priority = _BALANCE_TYPE_PRIORITY.get(balance.balance_type, _DEFAULT_BALANCE_PRIORITY)
+            current = balances_by_account.get(balance.account_id)
+            if current is None or priority < current[1]:
+                balances_by_account[balance.account_id] = (amount, priority)
+            logger.debug("Balance for %s: %s %s (type: %s)", balance.account_id, amount, balance.currency, balance.balance_type)
 
         # Sum all account balances (one per account)
-        net_worth = sum(amount for amount, _ in balances_by_account.values())
-        logger.info(f"Calculated net_worth: {net_worth} (from {len(balances_by_account)} accounts, {len(balances)} total balance records)")
+        net_worth = sum((amount for amount, _ in balances_by_account.values()), 0.0)
+        logger.info("Calculated net_worth: %s (from %d accounts, %d total balance records)", net_worth, len(balances_by_account), len(balances))
         
         # Check if we should show demo data (only if no real data AND have linked accounts)
         from app.services.account_linking import AccountLinkingService
@@ -110,76 +276,62 @@ class AnalyticsService:
         # Try to get real data first - only show demo if we have linked accounts but no real data
         # This happens when credentials are missing or banks are unavailable
         # IMPORTANT: Check if we actually tried to get real data (by checking credentials)
-        from app.services.aggregation import _has_bank_credentials
-        
         # Check if any bank has credentials - if yes, we should try to get real data
-        has_credentials = any(_has_bank_credentials(bank) for bank in ["vbank", "abank", "sbank"])
+        has_credentials = any(_has_bank_credentials(bank) for bank in _BANK_CODES)
         
         # Real data exists if we got accounts or balances with non-zero amounts
         has_real_data = net_worth > 0.0 or len(accounts) > 0
         
-        logger.info(f"Analytics for {client_id}: net_worth={net_worth}, accounts={len(accounts)}, balances={len(balances)}, has_real_data={has_real_data}, has_credentials={has_credentials}, linked_accounts={len(linked_accounts)}")
+        logger.info(
+            "Analytics for %s: net_worth=%s, accounts=%d, balances=%d, has_real_data=%s, has_credentials=%s, linked_accounts=%d",
+            client_id, net_worth, len(accounts), len(balances), has_real_data, has_credentials, len(linked_accounts),
+        )
         
         # Only show demo data if:
         # 1. We don't have real data AND
-        # 2. We have linked accounts AND
-        # 3. We don't have credentials (so we couldn't get real data)
-        # OR if we have credentials but got timeout/error (len(accounts) == 0 and len(balances) == 0)
-        if not has_real_data and len(linked_accounts) > 0:
+        # 2. We have linked accounts
+        # This covers both missing credentials and timeouts/errors with credentials.
+        # The common path (real data) skips every demo branch below.
+        show_demo = not has_real_data and len(linked_accounts) > 0
+        if show_demo:
             if not has_credentials:
                 # No credentials - show demo data
-                logger.info(f"Showing demo data: no credentials configured, but have {len(linked_accounts)} linked accounts")
+                logger.info("Showing demo data: no credentials configured, but have %d linked accounts", len(linked_accounts))
             else:
                 # Have credentials but got no data - might be timeout or error
                 # Still show demo data so user sees something
-                logger.warning(f"Showing demo data: have credentials but got no real data (timeout or error?), have {len(linked_accounts)} linked accounts")
+                logger.warning("Showing demo data: have credentials but got no real data (timeout or error?), have %d linked accounts", len(linked_accounts))
             
             net_worth = len(linked_accounts) * 50000.0  # Demo: 50k per account
             # Create demo account objects
             accounts = []
             for acc in linked_accounts:
-                account_obj = type('Account', (), {
-                    'account_id': acc['account_number'],
-                    'bank': acc['bank'],
-                    'currency': 'RUB',
-                    'account_type': 'current',
-                    'nickname': acc.get('nickname')
-                })()
+                account_obj = Account(
+                    account_id=acc['account_number'],
+                    bank=acc['bank'],
+                    currency='RUB',
+                    account_type='current',
+                    nickname=acc.get('nickname'),
+                )
                 accounts.append(account_obj)
 
-        # Get transactions with timeout protection
-        from_date = datetime.now() - timedelta(days=period_days)
-        try:
-            transactions = await asyncio.wait_for(
-                AggregationService.get_transactions(client_id, from_date=from_date),
-                timeout=10.0  # 10 second timeout for getting transactions
-            )
-        except asyncio.TimeoutError:
-            # If timeout, use empty list - will fall back to demo data if linked accounts exist
-            transactions = []
+        # One pass over transactions feeds both category spending and the weekly trend
+        spending_by_merchant, weekly_spending = AnalyticsService._sum_expenses(transactions)
 
         # Calculate spending by category
+        # Expenses are summed per distinct (MCC, description) first - recurring merchants
+        # repeat a lot - so each distinct pair is categorized once instead of once per transaction
         spending_by_category: dict[str, float] = defaultdict(float)
-        total_spending = 0.0
-
-        for transaction in transactions:
-            try:
-                amount = float(transaction.amount)
-                if amount < 0:  # Only expenses
-                    category = AnalyticsService._categorize_transaction(transaction)
-                    spending_by_category[category] += abs(amount)
-                    total_spending += abs(amount)
-            except (ValueError, TypeError):
-                pass
+        for (mcc, description), amount in spending_by_merchant.items():
+            spending_by_category[AnalyticsService._categorize(mcc, description)] += amount
+        # Merchant sums already cover every expense, and there are fewer of them
+        total_spending = sum(spending_by_merchant.values(), 0.0)
         
-        # If no real transactions but have linked accounts, show demo data
-        # BUT: Only show demo if we don't have real account/balance data
-        # If we have real accounts/balances, show empty spending (no demo)
-        has_real_transactions = total_spending > 0.0 or len(transactions) > 0
-        if not has_real_transactions and len(linked_accounts) > 0 and not has_real_data:
-            # Only show demo spending if we don't have real account/balance data
+        # If no real transactions and no real account/balance data, show demo spending
+        # With real accounts/balances but no transactions, spending stays empty (real data)
+        if show_demo and not transactions:
             # Demo spending data
-            logger.info(f"Showing demo spending data: no real transactions and no real account data")
+            logger.info("Showing demo spending data: no real transactions and no real account data")
             spending_by_category = {
                 "groceries": 8000.0,
                 "transport": 5000.0,
@@ -187,47 +339,36 @@ class AnalyticsService:
                 "shopping": 5000.0,
             }
             total_spending = sum(spending_by_category.values())
-        elif not has_real_transactions and has_real_data:
-            # Have real accounts/balances but no transactions - show empty spending (real data)
-            # This is correct - we have real data, just no transactions yet
-            logger.info(f"Real accounts/balances exist but no transactions - showing empty spending (this is correct, real data)")
-            spending_by_category = {}
-            total_spending = 0.0
-        elif has_real_transactions:
+        elif transactions:
             # We have real transactions - this is real data
-            logger.info(f"Real transactions found: {len(transactions)} transactions, total_spending={total_spending}")
+            logger.info("Real transactions found: %d transactions, total_spending=%s", len(transactions), total_spending)
 
         # Get top expenses
-        top_expenses = sorted(
-            [
-                {"category": cat, "amount": amount}
-                for cat, amount in spending_by_category.items()
-            ],
-            key=lambda x: x["amount"],
-            reverse=True,
-        )[:5]
+        # Objects rather than tuples: the frontend reads {category, amount}. They are
+        # built once per summary build and reused from _summaries between builds
+        top_expenses = [
+            {"category": cat, "amount": amount}
+            for cat, amount in heapq.nlargest(
+                5, spending_by_category.items(), key=operator.itemgetter(1)
+            )
+        ]
 
         # Calculate weekly spending trend
-        weekly_trend = AnalyticsService._calculate_weekly_trend(transactions)
+        weekly_trend = AnalyticsService._calculate_weekly_trend(weekly_spending)
         
-        # If no real trend but have linked accounts, show demo trend
-        # BUT: Only show demo if we don't have real account/balance data
-        # If we have real accounts/balances, show empty trend (no demo)
-        if len(weekly_trend) == 0 and len(linked_accounts) > 0 and not has_real_data:
-            # Only show demo trend if we don't have real account/balance data
-            logger.info(f"Showing demo weekly trend: no real transactions and no real account data")
+        # If no real trend and no real account/balance data, show demo trend
+        # With real accounts/balances but no transactions, the trend stays empty (real data)
+        if show_demo and not weekly_trend:
+            logger.info("Showing demo weekly trend: no real transactions and no real account data")
             # Demo weekly trend (last 4 weeks)
             weekly_trend = []
+            now = datetime.now()
             for i in range(4, 0, -1):
-                week_date = datetime.now() - timedelta(weeks=i)
+                week_date = now - timedelta(weeks=i)
                 weekly_trend.append({
                     "week": week_date.strftime("%Y-%m-%d"),
                     "spending": 5000.0 + (i * 500.0)  # Demo: increasing trend
                 })
-        elif len(weekly_trend) == 0 and has_real_data:
-            # Have real accounts/balances but no transactions - show empty trend (real data)
-            logger.info(f"Real accounts/balances exist but no transactions - showing empty trend")
-            weekly_trend = []
 
         result = {
             "net_worth": net_worth,
@@ -240,85 +381,107 @@ class AnalyticsService:
         }
         
         # Log final result for debugging
-        logger.info(f"Returning analytics summary: net_worth={result['net_worth']}, total_accounts={result['total_accounts']}, total_spending={result['total_spending']}, has_spending_data={len(result['spending_by_category']) > 0}")
-        
+        logger.info(
+            "Returning analytics summary: net_worth=%s, total_accounts=%d, total_spending=%s, has_spending_data=%s",
+            result["net_worth"], result["total_accounts"], result["total_spending"], len(result["spending_by_category"]) > 0,
+        )
+
         return result
 
     @staticmethod
-    def _categorize_transaction(transaction: Any) -> str:
-        """Categorize transaction based on description or MCC.
+    async def _get_transactions(
+        client_id: str, period_days: int, accounts: list[Any]
+    ) -> list[Any]:
+        """Get transactions for the analysis period, reusing recently fetched ones.
 
         Args:
-            transaction: Transaction object
+            client_id: Client ID
+            period_days: Number of days to analyze
+            accounts: Already fetched accounts
 
         Returns:
-            Category name
+            List of transactions
         """
-        description = (transaction.description or "").lower()
-        mcc = transaction.mcc or ""
+        key = (client_id, period_days)
+        transactions = AnalyticsService._transactions.get(key)
+        if transactions is None:
+            from_date = datetime.now() - timedelta(days=period_days)
+            transactions, complete = await AggregationService.get_transactions_with_status(
+                client_id, from_date=from_date, accounts=accounts
+            )
+            # Don't pin an empty or partial result (bank outage) for the whole TTL
+            if transactions and complete:
+                AnalyticsService._transactions.set(key, transactions)
+        return transactions
+
+    @staticmethod
+    def _categorize(mcc: str, description: str) -> str:
+        """Categorize by MCC, falling back to description keywords.
+
+        Args:
+            mcc: Merchant category code ("" if unknown)
+            description: Transaction description ("" if unknown)
 
+        Returns:
+            Category name
+        """
         # MCC-based categorization
-        if mcc:
-            mcc_int = int(mcc) if mcc.isdigit() else 0
-            if 5411 <= mcc_int <= 5412:  # Grocery stores
-                return "groceries"
-            elif 5812 <= mcc_int <= 5814:  # Restaurants
-                return "restaurants"
-            elif 5541 <= mcc_int <= 5542:  # Gas stations
-                return "gas"
-            elif 5912 <= mcc_int <= 5912:  # Pharmacies
-                return "pharmacy"
-            elif 5311 <= mcc_int <= 5311:  # Department stores
-                return "shopping"
+        if mcc.isdigit():
+            category = _MCC_CATEGORIES.get(int(mcc))
+            if category:
+                return category
 
         # Description-based categorization
-        if any(word in description for word in ["магазин", "store", "супермаркет"]):
-            return "groceries"
-        elif any(word in description for word in ["ресторан", "кафе", "restaurant", "cafe"]):
-            return "restaurants"
-        elif any(word in description for word in ["заправка", "gas", "бензин"]):
-            return "gas"
-        elif any(word in description for word in ["аптека", "pharmacy"]):
-            return "pharmacy"
-        elif any(word in description for word in ["транспорт", "transport", "метро", "metro"]):
-            return "transport"
-        elif any(word in description for word in ["развлечения", "entertainment", "кино", "cinema"]):
-            return "entertainment"
-
-        return "other"
+        return _description_category(description) or "other"
 
     @staticmethod
-    def _calculate_weekly_trend(transactions: list[Any]) -> list[dict[str, Any]]:
-        """Calculate weekly spending trend.
+    def _sum_expenses(
+        transactions: list[Any],
+    ) -> tuple[dict[tuple[str, str], float], dict[int, float]]:
+        """Sum expenses per merchant and per week in a single pass.
 
         Args:
             transactions: List of transactions
 
         Returns:
-            List of weekly spending data
+            Tuple of (absolute spending per (MCC, description),
+            absolute spending per week start as a day ordinal)
         """
-        weekly_spending: dict[str, float] = defaultdict(float)
+        spending_by_merchant: dict[tuple[str, str], float] = defaultdict(float)
+        weekly_spending: dict[int, float] = defaultdict(float)
 
         for transaction in transactions:
-            try:
-                amount = float(transaction.amount)
-                if amount < 0:  # Only expenses
-                    booking_date = datetime.fromisoformat(
-                        transaction.booking_date.replace("Z", "+00:00")
-                    )
-                    week_start = booking_date - timedelta(
-                        days=booking_date.weekday()
-                    )
-                    week_key = week_start.strftime("%Y-%m-%d")
-                    weekly_spending[week_key] += abs(amount)
-            except (ValueError, TypeError, AttributeError):
-                pass
-
-        # Convert to list sorted by date
+            amount = transaction.amount_value
+            if amount is None or not amount < 0:  # Only expenses (also skips NaN)
+                continue
+            amount = -amount
+            spending_by_merchant[(transaction.mcc or "", transaction.description or "")] += amount
+
+            week = _week_start(transaction.booking_date[:10])
+            if week is None:
+                # Date prefix did not parse, fall back to the full timestamp
+                booking_date = transaction.booking_datetime
+                if booking_date is None:
+                    continue
+                week = booking_date.toordinal() - booking_date.weekday()
+            weekly_spending[week] += amount
+
+        return spending_by_merchant, weekly_spending
+
+    @staticmethod
+    def _calculate_weekly_trend(weekly_spending: dict[int, float]) -> list[dict[str, Any]]:
+        """Calculate weekly spending trend.
+
+        Args:
+            weekly_spending: Spending per week start (Monday) as a day ordinal
+
+        Returns:
+            List of weekly spending data
+        """
+        # Convert to list sorted by date, formatting each week only once
         trend = [
-            {"week": week, "spending": spending}
+            {"week": date.fromordinal(week).strftime("%Y-%m-%d"), "spending": spending}
             for week, spending in sorted(weekly_spending.items())
         ]
 
         return trend
-
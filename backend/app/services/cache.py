@@ -0,0 +1,84 @@
+"""Short-lived cache for bank API responses."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.core.cache import TTLCache, single_flight
+from app.core.exceptions import ConsentRequiredError
+
+# Per-endpoint TTLs (seconds)
+ACCOUNTS_TTL = 60.0
+BALANCES_TTL = 15.0
+TRANSACTIONS_TTL = 30.0
+
+# How long an expired response may still be served if the bank API fails
+STALE_TTL = 3600.0
+
+# In-memory storage (in production, use Redis)
+# key -> (fresh_until, response); entries are dropped after STALE_TTL
+_responses = TTLCache(maxsize=10_000, ttl=STALE_TTL)
+
+# Requests currently in flight: concurrent callers for the same key await
+# the same task instead of hitting the bank API again
+_inflight: dict[Hashable, asyncio.Task] = {}
+
+
+async def cached(
+    key: Hashable,
+    ttl: float,
+    coro_factory: Callable[[], Awaitable[Any]],
+    timeout: Optional[float] = None,
+) -> Any:
+    """Return cached response for key, calling the bank API on a miss.
+
+    Keys must include bank code, client ID and (where relevant) account ID,
+    otherwise one client's data could be served to another.
+    Concurrent calls with the same key share a single API request.
+    Exceptions are never cached. If the API call fails or times out, the
+    last successful response is served for up to STALE_TTL seconds.
+
+    Args:
+        key: Cache key, e.g. ("balances", bank_code, client_id, account_id)
+        ttl: Seconds a response is considered fresh
+        coro_factory: Zero-argument callable returning the API call coroutine
+        timeout: Timeout for the API call in seconds (None = no timeout)
+
+    Returns:
+        Cached or freshly fetched response
+
+    Raises:
+        ConsentRequiredError: If consent is missing (never masked by stale data)
+        Exception: API error or timeout when no previous response is available
+    """
+    entry = _responses.get(key)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+
+    return await single_flight(
+        _inflight, key, lambda: _fetch(key, ttl, coro_factory, timeout, entry)
+    )
+
+
+async def _fetch(
+    key: Hashable,
+    ttl: float,
+    coro_factory: Callable[[], Awaitable[Any]],
+    timeout: Optional[float],
+    entry: Optional[tuple[float, Any]],
+) -> Any:
+    """Call the bank API and cache the response, falling back to stale data."""
+    try:
+        async with asyncio.timeout(timeout):
+            value = await coro_factory()
+    except ConsentRequiredError:
+        raise
+    except Exception as e:
+        if entry is None:
+            raise
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Serving stale response for {key[0]} after error: {type(e).__name__}: {e}")
+        return entry[1]
+
+    _responses.set(key, (time.monotonic() + ttl, value))
+    return value
@@ -18,7 +18,8 @@ class CashbackService:
     """Service for managing cashback bonuses."""
 
     # In-memory storage (in production, use database)
-    _bonuses: dict[str, list[CashbackBonus]] = {}
+    # client_id -> lowercase category -> latest bonus for that category
+    _bonuses: dict[str, dict[str, CashbackBonus]] = {}
 
     @staticmethod
     def activate_cashback(
@@ -38,21 +39,20 @@ class CashbackService:
         Returns:
             Created cashback bonus
         """
+        now = datetime.now()
         if valid_until is None:
-            valid_until = datetime.now() + timedelta(days=30)
+            valid_until = now + timedelta(days=30)
 
         bonus = CashbackBonus(
             client_id=client_id,
             category=category,
             bonus_percent=bonus_percent,
             valid_until=valid_until,
-            activated_at=datetime.now(),
+            activated_at=now,
         )
 
-        if client_id not in CashbackService._bonuses:
-            CashbackService._bonuses[client_id] = []
-
-        CashbackService._bonuses[client_id].append(bonus)
+        # Re-activating a category replaces its previous bonus
+        CashbackService._bonuses.setdefault(client_id, {})[category.lower()] = bonus
         return bonus
 
     @staticmethod
@@ -65,13 +65,14 @@ class CashbackService:
         Returns:
             List of active bonuses
         """
-        if client_id not in CashbackService._bonuses:
+        bonuses = CashbackService._bonuses.get(client_id)
+        if not bonuses:
             return []
 
         now = datetime.now()
         active = [
             bonus
-            for bonus in CashbackService._bonuses[client_id]
+            for bonus in bonuses.values()
             if bonus.valid_until > now
         ]
 
@@ -90,8 +91,7 @@ class CashbackService:
         Returns:
             Active bonus if exists, None otherwise
         """
-        active_bonuses = CashbackService.get_active_bonuses(client_id)
-        for bonus in active_bonuses:
-            if bonus.category.lower() == category.lower():
-                return bonus
+        bonus = CashbackService._bonuses.get(client_id, {}).get(category.lower())
+        if bonus is not None and bonus.valid_until > datetime.now():
+            return bonus
         return None
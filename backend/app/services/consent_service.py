@@ -1,15 +1,52 @@
 """Service for managing account consents."""
+import asyncio
+import math
+import time
+from datetime import datetime
 from typing import Optional
 from app.clients.factory import get_bank_client
+from app.core.cache import single_flight
 from app.services.token_service import TokenService
 from app.settings import settings
 
 
+def _consent_key(client_id: str, bank_code: str) -> tuple[str, str]:
+    """Build storage key; bank codes are case-insensitive (VBank == vbank)."""
+    return client_id, bank_code.lower()
+
+
+def _consent_expiry(consent_response: dict) -> float:
+    """Get consent expiry from its expirationDateTime, if the bank sent one.
+
+    Args:
+        consent_response: Consent response (flat or wrapped in "data")
+
+    Returns:
+        Expiry as a Unix timestamp, or infinity if unknown
+    """
+    data = consent_response.get("data")
+    expiration = consent_response.get("expirationDateTime") or (
+        data.get("expirationDateTime") if isinstance(data, dict) else None
+    )
+    if not expiration:
+        return math.inf
+    try:
+        return datetime.fromisoformat(expiration).timestamp()
+    except (TypeError, ValueError):
+        return math.inf
+
+
 class ConsentService:
     """Service for managing account consents."""
     
-    # In-memory storage for consent IDs (client_id, bank_code) -> consent_id
-    _consent_ids: dict[tuple[str, str], str] = {}
+    # In-memory storage for consent IDs (client_id, bank_code) -> (expires_at, consent_id)
+    # This is the only consent store, so entries live until the consent's own
+    # expirationDateTime; consents revoked earlier are caught by the 403 handling
+    _consent_ids: dict[tuple[str, str], tuple[float, str]] = {}
+
+    # Consent requests in flight (client_id, bank_code) -> task, so concurrent
+    # callers create at most one consent; finished requests remove themselves
+    _consent_inflight: dict[tuple[str, str], asyncio.Task] = {}
 
     @staticmethod
     async def request_accounts_consent(
@@ -45,30 +82,32 @@ class ConsentService:
         # Body: { permissions: [...], client_id: "team268-1", requesting_bank: "team268" }
         # Note: X-Requesting-Bank must be "team268" (team ID without suffix), not "team268-1"
         client = get_bank_client(bank_code)
-        try:
-            consent_response = await client.request_accounts_consent(
-                bank_token=bank_token,
-                client_id=client_id,  # e.g., "team268-1" (client ID with suffix)
-                permissions=permissions,
-                requesting_bank=settings.requesting_bank_id,  # "team268" (team ID without suffix)
-                requesting_bank_name="FinGuru App",
-                reason="Aggregation for FinGuru",
+        consent_response = await client.request_accounts_consent(
+            bank_token=bank_token,
+            client_id=client_id,  # e.g., "team268-1" (client ID with suffix)
+            permissions=permissions,
+            requesting_bank=settings.requesting_bank_id,  # "team268" (team ID without suffix)
+            requesting_bank_name="FinGuru App",
+            reason="Aggregation for FinGuru",
+        )
+        
+        # Add bank code to response for consistency
+        consent_response["bank"] = bank_code
+        
+        # A new consent supersedes any previously cached one
+        ConsentService._consent_ids.pop(_consent_key(client_id, bank_code), None)
+
+        # Store consent_id if approved
+        consent_id = consent_response.get("consent_id")
+        if consent_id and consent_response.get("status") == "approved":
+            ConsentService._consent_ids[_consent_key(client_id, bank_code)] = (
+                _consent_expiry(consent_response), consent_id
             )
-            
-            # Add bank code to response for consistency
-            consent_response["bank"] = bank_code
-            
-            # Store consent_id if approved
-            consent_id = consent_response.get("consent_id")
-            if consent_id and consent_response.get("status") == "approved":
-                ConsentService._consent_ids[(client_id, bank_code)] = consent_id
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"💾 Stored consent_id={consent_id} for client_id={client_id}, bank_code={bank_code}")
-            
-            return consent_response
-        finally:
-            await client.close()
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.info(f"💾 Stored consent_id={consent_id} for client_id={client_id}, bank_code={bank_code}")
+        
+        return consent_response
     
     @staticmethod
     def get_consent_id(client_id: str, bank_code: str) -> Optional[str]:
@@ -81,7 +120,16 @@ class ConsentService:
         Returns:
             Consent ID if available, None otherwise
         """
-        return ConsentService._consent_ids.get((client_id, bank_code))
+        key = _consent_key(client_id, bank_code)
+        entry = ConsentService._consent_ids.get(key)
+        if entry is None:
+            return None
+        expires_at, consent_id = entry
+        if time.time() >= expires_at:
+            # Consent expired
+            del ConsentService._consent_ids[key]
+            return None
+        return consent_id
     
     @staticmethod
     def clear_consent_id(client_id: str, bank_code: str) -> None:
@@ -91,5 +139,42 @@ class ConsentService:
             client_id: Client ID
             bank_code: Bank code
         """
-        ConsentService._consent_ids.pop((client_id, bank_code), None)
+        ConsentService._consent_ids.pop(_consent_key(client_id, bank_code), None)
 
+    @staticmethod
+    async def ensure_consent(
+        bank_code: str,
+        client_id: str,
+        permissions: Optional[list[str]] = None,
+    ) -> tuple[Optional[str], bool]:
+        """Get stored consent ID, requesting a new consent if none is stored.
+
+        Concurrent callers for the same client and bank share one consent
+        request. Every consent creation should go through here.
+
+        Args:
+            bank_code: Bank code (vbank, abank, sbank)
+            client_id: Client ID
+            permissions: List of permissions (default: see request_accounts_consent)
+
+        Returns:
+            Tuple of (consent ID if available or approved, whether the new
+            consent is pending manual approval (SBank))
+        """
+        consent_id = ConsentService.get_consent_id(client_id, bank_code)
+        if consent_id:
+            return consent_id, False
+
+        consent_response = await single_flight(
+            ConsentService._consent_inflight,
+            _consent_key(client_id, bank_code),
+            lambda: ConsentService.request_accounts_consent(
+                bank_code=bank_code,
+                client_id=client_id,
+                permissions=permissions,
+            ),
+        )
+        return (
+            ConsentService.get_consent_id(client_id, bank_code),
+            consent_response.get("status") == "pending",
+        )
@@ -1,5 +1,6 @@
 """Service for managing and caching bank tokens."""
-from datetime import datetime, timedelta
+import asyncio
+import time
 from typing import Optional
 from app.clients.factory import get_bank_client
 from app.core.base_client import BaseBankClient
@@ -26,9 +27,8 @@ class TokenCache:
             return None
 
         token_data = self._tokens[bank_code]
-        expires_at = token_data.get("expires_at")
 
-        if expires_at and datetime.now() >= expires_at:
+        if time.monotonic() >= token_data["expires_at_monotonic"]:
             # Token expired
             del self._tokens[bank_code]
             return None
@@ -43,14 +43,15 @@ class TokenCache:
             token_data: Token response from bank
         """
         expires_in = token_data.get("expires_in", 86400)
-        expires_at = datetime.now() + timedelta(seconds=expires_in - 60)  # 1 min buffer
+        # Monotonic clock: cheaper than datetime.now() and immune to wall-clock jumps
+        expires_at_monotonic = time.monotonic() + expires_in - 60  # 1 min buffer
 
         self._tokens[bank_code] = {
             "access_token": token_data["access_token"],
             "token_type": token_data.get("token_type", "bearer"),
             "client_id": token_data.get("client_id"),
             "expires_in": expires_in,
-            "expires_at": expires_at,
+            "expires_at_monotonic": expires_at_monotonic,
         }
 
     def clear(self, bank_code: Optional[str] = None) -> None:
@@ -72,6 +73,9 @@ _token_cache = TokenCache()
 class TokenService:
     """Service for managing bank tokens."""
 
+    # Per-bank locks so concurrent callers share one token refresh
+    _refresh_locks: dict[str, asyncio.Lock] = {}
+
     @staticmethod
     async def get_bank_token(bank_code: str, force_refresh: bool = False) -> dict:
         """Get bank token, using cache if available.
@@ -88,14 +92,21 @@ class TokenService:
             if cached:
                 return cached
 
-        # Get fresh token
-        client = get_bank_client(bank_code)
-        try:
+        lock = TokenService._refresh_locks.get(bank_code)
+        if lock is None:
+            lock = TokenService._refresh_locks[bank_code] = asyncio.Lock()
+        async with lock:
+            # Another caller may have refreshed the token while we were waiting
+            if not force_refresh:
+                cached = _token_cache.get(bank_code)
+                if cached:
+                    return cached
+
+            # Get fresh token
+            client = get_bank_client(bank_code)
             token_data = await client.get_bank_token()
             _token_cache.set(bank_code, token_data)
             return _token_cache.get(bank_code)
-        finally:
-            await client.close()
 
     @staticmethod
     def clear_cache(bank_code: Optional[str] = None) -> None:
@@ -1,8 +1,17 @@
 """Application settings and configuration."""
-from pydantic_settings import BaseSettings
+import dataclasses
+import os
+from dataclasses import dataclass
 
+from dotenv import dotenv_values
 
-class Settings(BaseSettings):
+# Accepted spellings for bool settings (case-insensitive)
+_TRUE_VALUES = frozenset(("1", "true", "yes", "on"))
+_FALSE_VALUES = frozenset(("0", "false", "no", "off"))
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """Application settings."""
 
     # App
@@ -26,12 +35,53 @@ class Settings(BaseSettings):
     http_timeout_seconds: int = 15
     cache_ttl_seconds: int = 300
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8-sig"  # Handle BOM in .env files
-        case_sensitive = False
-        extra = "ignore"  # Ignore extra fields in .env
+    # Non-standard GET /balances?account_ids=... batch endpoint; no bank spec
+    # defines it, so it is only probed when explicitly enabled
+    batch_balances_enabled: bool = False
+
+
+def _load(env_file: str = ".env") -> Settings:
+    """Load settings from the environment and an optional .env file.
+
+    Environment variables take precedence over the .env file. Names are
+    case-insensitive and unknown names are ignored.
+
+    Args:
+        env_file: Path to the .env file
+
+    Returns:
+        Settings instance
+
+    Raises:
+        ValueError: If an int or bool setting has an invalid value
+    """
+    # utf-8-sig handles BOM in .env files
+    values = {
+        key.lower(): value
+        for key, value in dotenv_values(env_file, encoding="utf-8-sig").items()
+        if value is not None
+    }
+    values.update((key.lower(), value) for key, value in os.environ.items())
 
+    kwargs = {}
+    for field in dataclasses.fields(Settings):
+        if field.name in values:
+            value = values[field.name]
+            if field.type is int:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"{field.name.upper()} must be an integer, got {value!r}") from None
+            elif field.type is bool:
+                flag = value.strip().lower()
+                if flag in _TRUE_VALUES:
+                    value = True
+                elif flag in _FALSE_VALUES:
+                    value = False
+                else:
+                    raise ValueError(f"{field.name.upper()} must be true or false, got {value!r}")
+            kwargs[field.name] = value
+    return Settings(**kwargs)
 
-settings = Settings()
 
+settings = _load()
@@ -1,5 +1,7 @@
 """Utility script to check .env configuration."""
+import codecs
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -7,42 +9,40 @@ from pathlib import Path
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+# KEY=value line; comments and blank lines never match since a key must start the line
+_ENV_LINE_RE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+# Report line formatters, bound once instead of re-evaluating an f-string per variable
+_OK_LINE = "[OK] {:25} = {}".format
+_ERROR_LINE = "[ERROR] {:25} = (не задано)".format
+
+
+def _read_env_file(env_path: Path) -> dict[str, str]:
+    """Parse .env file into a name -> value dict."""
+    raw = env_path.read_bytes()
+    if raw.startswith(codecs.BOM_UTF8):  # Handle BOM in .env files
+        raw = raw[len(codecs.BOM_UTF8):]
+    text = raw.decode('utf-8', errors='replace')
+    return dict(_ENV_LINE_RE.findall(text))
+
+
+def _write_lines(lines: list[str]) -> None:
+    """Write collected output lines to stdout in one call."""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
 def check_env():
     """Check .env file configuration."""
+    # Collect output and write it once at the end instead of one write per line
+    out: list[str] = []
+    p = out.append
     env_path = Path(__file__).parent / ".env"
     
-    print("=" * 60)
-    print("Проверка конфигурации .env")
-    print("=" * 60)
-    print()
-    
-    if not env_path.exists():
-        print("[ERROR] Файл .env не найден!")
-        print(f"   Ожидаемый путь: {env_path}")
-        print()
-        print("Создайте файл .env в папке backend/ с содержимым:")
-        print()
-        print("VBANK_CLIENT_ID=team268")
-        print("VBANK_CLIENT_SECRET=ваш_ключ")
-        print("ABANK_CLIENT_ID=team268")
-        print("ABANK_CLIENT_SECRET=ваш_ключ")
-        print("SBANK_CLIENT_ID=team268")
-        print("SBANK_CLIENT_SECRET=ваш_ключ")
-        return False
-    
-        print(f"[OK] Файл .env найден: {env_path}")
-    print()
-    
-    # Read .env file
-    env_vars = {}
-    with open(env_path, 'r', encoding='utf-8-sig') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if '=' in line:
-                key, value = line.split('=', 1)
-                env_vars[key.strip()] = value.strip()
+    p("=" * 60)
+    p("Проверка конфигурации .env")
+    p("=" * 60)
+    p("")
     
     # Check required variables
     required_vars = [
@@ -54,51 +54,84 @@ def check_env():
         'SBANK_CLIENT_SECRET',
     ]
     
-    print("Проверка переменных окружения:")
-    print("-" * 60)
+    # Process environment wins over .env (same as app.settings), so the file
+    # only needs to be read when some variable is missing from the environment
+    # Pre-seeded with every required variable; unset ones stay empty
+    env_vars = dict.fromkeys(required_vars, '')
+    in_environ = [var for var in required_vars if var in os.environ]
+    if len(in_environ) == len(required_vars):
+        p("[OK] Все переменные заданы в окружении процесса, .env не читается")
+        p("")
+    elif not env_path.exists():
+        p("[ERROR] Файл .env не найден!")
+        p(f"   Ожидаемый путь: {env_path}")
+        p("")
+        p("Создайте файл .env в папке backend/ с содержимым:")
+        p("")
+        p("VBANK_CLIENT_ID=team268")
+        p("VBANK_CLIENT_SECRET=ваш_ключ")
+        p("ABANK_CLIENT_ID=team268")
+        p("ABANK_CLIENT_SECRET=ваш_ключ")
+        p("SBANK_CLIENT_ID=team268")
+        p("SBANK_CLIENT_SECRET=ваш_ключ")
+        _write_lines(out)
+        return False
+    else:
+        p(f"[OK] Файл .env найден: {env_path}")
+        p("")
+        
+        # Read .env file, keeping only the required variables
+        file_vars = _read_env_file(env_path)
+        env_vars.update((var, file_vars[var]) for var in env_vars.keys() & file_vars.keys())
+    env_vars.update((var, os.environ[var]) for var in in_environ)
+    
+    p("Проверка переменных окружения:")
+    p("-" * 60)
     
     all_ok = True
     for var in required_vars:
-        value = env_vars.get(var, '')
+        value = env_vars[var]
         if value:
             # Mask secret values
             if 'SECRET' in var:
                 display_value = value[:4] + '...' if len(value) > 4 else '***'
             else:
                 display_value = value
-            print(f"[OK] {var:25} = {display_value}")
+            p(_OK_LINE(var, display_value))
             
             # Check for common issues
-            if value.startswith('"') or value.startswith("'"):
-                print(f"   [WARN] ВНИМАНИЕ: Значение в кавычках! Уберите кавычки.")
+            quoted = value.startswith(('"', "'"))
+            if quoted:
+                p("   [WARN] ВНИМАНИЕ: Значение в кавычках! Уберите кавычки.")
                 all_ok = False
-            if ' ' in value and not (value.startswith('"') or value.startswith("'")):
-                print(f"   [WARN] ВНИМАНИЕ: Пробелы в значении могут вызвать проблемы.")
+            if ' ' in value and not quoted:
+                p("   [WARN] ВНИМАНИЕ: Пробелы в значении могут вызвать проблемы.")
         else:
-            print(f"[ERROR] {var:25} = (не задано)")
+            p(_ERROR_LINE(var))
             all_ok = False
     
-    print()
-    print("-" * 60)
+    p("")
+    p("-" * 60)
     
     if all_ok:
-        print("[OK] Все переменные настроены!")
-        print()
-        print("Следующие шаги:")
-        print("1. Убедитесь, что значения правильные (без кавычек, без лишних пробелов)")
-        print("2. Перезапустите backend (Ctrl+C и запустите заново)")
-        print("3. Попробуйте получить токен через Swagger UI")
+        p("[OK] Все переменные настроены!")
+        p("")
+        p("Следующие шаги:")
+        p("1. Убедитесь, что значения правильные (без кавычек, без лишних пробелов)")
+        p("2. Перезапустите backend (Ctrl+C и запустите заново)")
+        p("3. Попробуйте получить токен через Swagger UI")
     else:
-        print("[ERROR] Найдены проблемы в конфигурации!")
-        print()
-        print("Исправьте следующие проблемы:")
-        print("1. Добавьте недостающие переменные")
-        print("2. Убедитесь, что нет кавычек вокруг значений")
-        print("3. Убедитесь, что нет пробелов вокруг знака =")
-        print("4. Перезапустите backend после изменений")
+        p("[ERROR] Найдены проблемы в конфигурации!")
+        p("")
+        p("Исправьте следующие проблемы:")
+        p("1. Добавьте недостающие переменные")
+        p("2. Убедитесь, что нет кавычек вокруг значений")
+        p("3. Убедитесь, что нет пробелов вокруг знака =")
+        p("4. Перезапустите backend после изменений")
     
-    print()
-    print("=" * 60)
+    p("")
+    p("=" * 60)
+    _write_lines(out)
     
     return all_ok
 
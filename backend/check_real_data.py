@@ -7,39 +7,38 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.settings import settings
-from app.services.aggregation import AggregationService, _has_bank_credentials
-from app.services.account_linking import AccountLinkingService
+
+# Bank code -> (client ID setting, client secret setting)
+_BANK_ATTRS = {
+    bank: (f"{bank}_client_id", f"{bank}_client_secret")
+    for bank in ("vbank", "abank", "sbank")
+}
 
 
 async def check_credentials():
     """Проверить, загружены ли credentials."""
     print("\n=== ПРОВЕРКА CREDENTIALS ===")
     
-    banks = ["vbank", "abank", "sbank"]
     has_any = False
     
-    for bank in banks:
-        has_creds = _has_bank_credentials(bank)
+    for bank, (id_attr, secret_attr) in _BANK_ATTRS.items():
+        # Same rule as aggregation._has_bank_credentials, without importing the service stack
+        has_creds = bool(getattr(settings, id_attr) and getattr(settings, secret_attr))
         status = "✅ ЕСТЬ" if has_creds else "❌ НЕТ"
         print(f"{bank.upper()}: {status}")
         
         if has_creds:
             has_any = True
-            if bank == "vbank":
-                print(f"  Client ID: {settings.vbank_client_id}")
-                print(f"  Secret: {'***' if settings.vbank_client_secret else 'НЕТ'}")
-            elif bank == "abank":
-                print(f"  Client ID: {settings.abank_client_id}")
-                print(f"  Secret: {'***' if settings.abank_client_secret else 'НЕТ'}")
-            elif bank == "sbank":
-                print(f"  Client ID: {settings.sbank_client_id}")
-                print(f"  Secret: {'***' if settings.sbank_client_secret else 'НЕТ'}")
+            print(f"  Client ID: {getattr(settings, id_attr)}")
+            print(f"  Secret: {'***' if getattr(settings, secret_attr) else 'НЕТ'}")
     
     return has_any
 
 
 async def check_linked_accounts(client_id: str = "team268-1"):
     """Проверить привязанные счета."""
+    from app.services.account_linking import AccountLinkingService
+
     print(f"\n=== ПРОВЕРКА ПРИВЯЗАННЫХ СЧЕТОВ (client_id={client_id}) ===")
     
     linked = AccountLinkingService.get_linked_accounts(client_id)
@@ -53,8 +52,13 @@ async def check_linked_accounts(client_id: str = "team268-1"):
 
 async def check_real_data(client_id: str = "team268-1"):
     """Попытаться получить реальные данные."""
+    from app.services.aggregation import AggregationService
+
     print(f"\n=== ПОПЫТКА ПОЛУЧИТЬ РЕАЛЬНЫЕ ДАННЫЕ (client_id={client_id}) ===")
     
+    # Счета запрашиваются первыми: get_accounts создаёт consent, нужный балансам,
+    # а готовые счета передаются в get_balances, чтобы не запрашивать их повторно.
+    # Счета выводятся сразу, не дожидаясь балансов
     try:
         print("Получение счетов...")
         accounts = await AggregationService.get_accounts(client_id)
@@ -67,7 +71,7 @@ async def check_real_data(client_id: str = "team268-1"):
     
     try:
         print("\nПолучение балансов...")
-        balances = await AggregationService.get_balances(client_id)
+        balances = await AggregationService.get_balances(client_id, accounts=accounts)
         print(f"  Получено балансов: {len(balances)}")
         for bal in balances:
             print(f"    - {bal.account_id}: {bal.amount} {bal.currency}")
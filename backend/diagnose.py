@@ -0,0 +1,37 @@
+"""Run all backend diagnostics in a single interpreter.
+
+Runs check_env.py, test_startup.py and check_real_data.py in turn. The
+startup test imports app.main in this interpreter instead of a subprocess,
+so Python startup and the app import are paid once and check_real_data
+reuses the loaded app. The individual scripts still work on their own.
+"""
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from check_env import check_env
+from test_startup import test_startup
+
+
+async def main() -> bool:
+    """Run all diagnostics.
+
+    Returns:
+        True if the .env check and the startup test passed
+    """
+    env_ok = check_env()
+    print()
+    startup_ok = await test_startup(isolated=False)
+    print()
+    # Imported only now so test_startup times the first settings and app imports
+    import check_real_data
+    await check_real_data.main()
+    return env_ok and startup_ok
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)